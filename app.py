@@ -1,47 +1,186 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, jsonify, url_for, stream_with_context
 import os
-from langchain_core.messages import HumanMessage
-from core.workflow import compile_research_team
+import queue
+import threading
+import uuid
+from core.workflow import research_team_registry, run_research_team
+from core.budget import RunBudget
+from core.preload import preload, preload_enabled
+from core.jobs import JobQueue, QueueFullError
+from core.metrics import research_metrics
+from core.store import get_report_store
+from core.serving import saved_at, lookup_archived, archive_report, sse, stream_events
 
 app = Flask(__name__)
 
 # Load Google API key from environment variable or .env
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
+# Under gunicorn.conf.py (RESEARCH_PRELOAD=1) the master loads the LLM/graph stack and builds the
+# graph before forking workers; otherwise both happen on the first request, so workers boot fast
+if preload_enabled():
+    try:
+        preload()
+    except Exception as e:
+        app.logger.warning('Research graph not preloaded: %s', e)
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def _run_job(job_id, topic, should_stop):
+    archived = lookup_archived(topic)
+    if archived is not None:
+        return {'final_report': archived['report']}
+    # Job threads are stable across restarts, so a recovered job continues from its last checkpoint
+    final_state = run_research_team(topic, thread_id=f'job_{job_id}', should_stop=should_stop, resume=True)
+    archive_report(topic, final_state)
+    return final_state
+
+def get_job_queue():
+    """Start the background job workers on first use"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(_run_job).start()
+            research_metrics.add_collector('research_jobs', lambda: {'queue_depth': _job_queue.depth()})
+    return _job_queue
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     report = None
     error = None
+    archived = None
     topic = ''
     if request.method == 'POST':
         topic = request.form.get('topic', '').strip()
+        try:
+            budget, budget_error = RunBudget.from_params(request.form), None
+        except ValueError as e:
+            budget, budget_error = None, f'Invalid budget: {e}'
+        if topic and not budget_error and not request.form.get('refresh'):
+            archived = lookup_archived(topic)
         if not topic:
             error = 'Please enter a research topic.'
+        elif budget_error:
+            error = budget_error
+        elif archived is not None:
+            report = archived['report']
         else:
             try:
-                app_graph = compile_research_team()
-                initial_state = {
-                    'messages': [HumanMessage(content=f'Research the topic: {topic}')],
-                    'research_topic': topic,
-                    'next': 'researcher',
-                    'current_agent': 'start',
-                    'findings': {},
-                    'final_report': ''
-                }
-                config = {'configurable': {'thread_id': 'web_session'}}
-                final_state = None
-                for step, state in enumerate(app_graph.stream(initial_state, config=config)):
-                    current_state = list(state.values())[0]
-                    final_state = current_state
-                    if step > 10:
-                        break
+                app_graph = research_team_registry.get()
+                # The graph and its checkpointer are shared, so each request needs its own thread
+                thread_id = f'web_{uuid.uuid4().hex}'
+                final_state = run_research_team(topic, thread_id=thread_id, app=app_graph, budget=budget)
                 if final_state and final_state['final_report']:
                     report = final_state['final_report']
+                    archive_report(topic, final_state)
+                    app.logger.info('Report for %r stopped (%s) after %d supervisor LLM call(s)', topic,
+                                    final_state['run_summary']['stop_reason'], final_state.get('supervisor_llm_calls', 0))
                 else:
                     error = 'No report generated.'
+                    if final_state and final_state.get('errors'):
+                        error += f" {final_state['errors'][-1]}"
             except Exception as e:
                 error = f'Error: {str(e)}'
-    return render_template('index.html', report=report, error=error, topic=topic)
+    return render_template('index.html', report=report, error=error, topic=topic, archived=archived)
+
+@app.route('/stream', methods=['GET'])
+def stream_research():
+    """Server-sent events: one event per agent transition, then the writer's report token by token"""
+    topic = request.args.get('topic', '').strip()
+    if not topic:
+        return jsonify(error='Please enter a research topic.'), 400
+    refresh = request.args.get('refresh')
+    try:
+        budget = RunBudget.from_params(request.args)
+    except ValueError as e:
+        return jsonify(error=f'Invalid budget: {e}'), 400
+    events = queue.Queue()
+    disconnected = threading.Event()
+
+    def produce():
+        stream_events(topic, events.put, f'web_{uuid.uuid4().hex}', refresh=refresh, budget=budget,
+                      should_stop=disconnected.is_set)
+
+    def generate():
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                yield sse(event)
+        finally:
+            # Client went away (or the run ended); stop the graph at the next node
+            disconnected.set()
+
+    threading.Thread(target=produce, name='research-stream', daemon=True).start()
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/search', methods=['GET'])
+def search_reports():
+    """Full-text search over archived reports (HTML, or JSON when the client asks for it)"""
+    query = request.args.get('q', '').strip()
+    results = []
+    for result in get_report_store().search(query) if query else []:
+        result['saved'] = saved_at(result['created_at'])
+        results.append(result)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(query=query, results=results)
+    return render_template('index.html', query=query, results=results, topic='')
+
+@app.route('/reports/<int:report_id>', methods=['GET'])
+def archived_report(report_id):
+    record = get_report_store().get(report_id)
+    if record is None:
+        return render_template('index.html', error='Unknown report.', topic=''), 404
+    archived = {'id': report_id, 'topic': record['topic'], 'match': 'exact', 'score': 1.0,
+                'saved': saved_at(record['created_at'])}
+    return render_template('index.html', report=record['report'], topic=record['topic'], archived=archived)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    payload = request.get_json(silent=True) or request.form
+    topic = (payload.get('topic') or '').strip()
+    if not topic:
+        return jsonify(error='Please enter a research topic.'), 400
+    jobs = get_job_queue()
+    try:
+        job_id = jobs.submit(topic)
+    except QueueFullError as e:
+        return jsonify(error=str(e)), 429, {'Retry-After': '30'}
+    return jsonify(job_id=job_id, status='queued', status_url=url_for('job_status', job_id=job_id)), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job.'), 404
+    job.pop('report')
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/report', methods=['GET'])
+def job_report(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job.'), 404
+    if job['status'] != 'done':
+        return jsonify(status=job['status'], error=job['error']), 409
+    return jsonify(job_id=job_id, topic=job['topic'], report=job['report'])
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    jobs = get_job_queue()
+    if jobs.get(job_id) is None:
+        return jsonify(error='Unknown job.'), 404
+    if not jobs.cancel(job_id):
+        return jsonify(error='Job has already finished.'), 409
+    return jsonify(job_id=job_id, status='cancelling'), 202
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(research_metrics.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
\ No newline at end of file
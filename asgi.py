@@ -0,0 +1,149 @@
+"""ASGI entry point: every research run is a coroutine on one event loop.
+
+    uvicorn asgi:app
+
+While an agent waits on the LLM it holds no thread, so one process can
+drive hundreds of concurrent reports. Endpoints:
+
+    POST /research        {"topic": ..., "refresh": false, "max_seconds": ...} -> {"topic", "report", "archived", "summary"}
+    GET  /stream?topic=   server-sent events (node, token, done, error), as in the Flask app
+    GET  /metrics         Prometheus metrics
+
+The HTML interface and the jobs API stay on the Flask (WSGI) app in app.py.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from urllib.parse import parse_qs
+from core.workflow import research_team_registry, arun_research_team
+from core.budget import RunBudget
+from core.metrics import research_metrics
+from core.serving import lookup_archived, archive_report, sse, astream_events
+
+logger = logging.getLogger(__name__)
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+async def _respond(send, status, body, content_type='application/json', headers=()):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', content_type.encode()), *headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _respond_json(send, status, payload):
+    await _respond(send, status, json.dumps(payload, default=str).encode('utf-8'))
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+async def research(scope, receive, send):
+    body = await _read_body(receive)
+    if _header(scope, b'content-type').startswith('application/json'):
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return await _respond_json(send, 400, {'error': 'Invalid JSON body.'})
+    else:
+        payload = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+    topic = str(payload.get('topic') or '').strip()
+    if not topic:
+        return await _respond_json(send, 400, {'error': 'Please enter a research topic.'})
+    try:
+        budget = RunBudget.from_params(payload)
+    except ValueError as e:
+        return await _respond_json(send, 400, {'error': f'Invalid budget: {e}'})
+    archived = None if payload.get('refresh') else await asyncio.to_thread(lookup_archived, topic)
+    if archived is not None:
+        return await _respond_json(send, 200, {'topic': topic, 'report': archived.pop('report'), 'archived': archived})
+    try:
+        final_state = await arun_research_team(topic, thread_id=f'asgi_{uuid.uuid4().hex}', budget=budget)
+    except Exception as e:
+        return await _respond_json(send, 500, {'error': f'Error: {str(e)}'})
+    if not final_state.get('final_report'):
+        errors = final_state.get('errors') or ['No report generated.']
+        return await _respond_json(send, 502, {'error': errors[-1], 'summary': final_state['run_summary']})
+    await asyncio.to_thread(archive_report, topic, final_state)
+    await _respond_json(send, 200, {'topic': topic, 'report': final_state['final_report'], 'archived': None,
+                                    'summary': final_state['run_summary']})
+
+async def stream(scope, receive, send):
+    """Server-sent events: one event per agent transition, then the writer's report token by token"""
+    query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+    topic = (query.get('topic') or [''])[0].strip()
+    if not topic:
+        return await _respond_json(send, 400, {'error': 'Please enter a research topic.'})
+    try:
+        budget = RunBudget.from_params({key: values[0] for key, values in query.items()})
+    except ValueError as e:
+        return await _respond_json(send, 400, {'error': f'Invalid budget: {e}'})
+    events = asyncio.Queue()
+    disconnected = asyncio.Event()
+
+    async def produce():
+        await astream_events(topic, events.put_nowait, f'asgi_{uuid.uuid4().hex}', refresh=bool(query.get('refresh')),
+                             budget=budget, should_stop=disconnected.is_set)
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        # Stop the graph at the next node
+        disconnected.set()
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')
+    ]})
+    producer = asyncio.ensure_future(produce())
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        while True:
+            event = await events.get()
+            if event is None or disconnected.is_set():
+                break
+            await send({'type': 'http.response.body', 'body': sse(event).encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.set()
+        watcher.cancel()
+        await producer
+
+async def metrics(scope, receive, send):
+    await _respond(send, 200, research_metrics.render().encode('utf-8'), 'text/plain; version=0.0.4')
+
+ROUTES = {
+    ('POST', '/research'): research,
+    ('GET', '/stream'): stream,
+    ('GET', '/metrics'): metrics,
+}
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Build the graph and LLM clients before the first request arrives
+            try:
+                await asyncio.to_thread(research_team_registry.warm)
+            except Exception as e:
+                logger.warning('Research graph not warmed at startup: %s', e)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await _respond_json(send, 404, {'error': 'Not found.'})
+    await handler(scope, receive, send)
@@ -0,0 +1,237 @@
+"""Benchmark the research graph against the offline fake LLM.
+
+Drives ``run_research_team`` directly ("graph" mode) and through the Flask
+endpoint ("http" mode) at several concurrency levels and writes one JSON
+document with latency percentiles, throughput, graph hops, prompt tokens and
+peak RSS per scenario, so results can be compared across versions.
+
+    python benchmarks/bench_research.py --concurrency 1 4 16 --topics 32 --output bench.json
+    python benchmarks/bench_research.py --check-budgets --check-archive
+
+With --check-budgets it instead runs single topics under small run budgets
+(BUDGET_CHECKS) and exits 1 when a run writes no report or spends more than
+its budget; only a budget too small for the writer alone may be overrun, by
+that one call. With --check-archive it looks up ARCHIVE_CHECKS pairs in a
+scratch report archive and exits 1 when a topic is served another topic's
+report, or misses a near-duplicate it should get.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_CHECKS = (
+    *({"max_llm_calls": calls} for calls in (1, 2, 3, 4, 5)),
+    *({"max_tokens": tokens} for tokens in (200, 800, 1500, 2500)),
+    {"max_llm_calls": 3, "max_tokens": 1500},
+)
+
+# (stored topic, requested topic, whether the stored report should be served)
+ARCHIVE_CHECKS = (
+    ("US exports to China", "China exports to US", False),
+    ("Men bite dogs", "Dogs bite men", False),
+    ("type 1 diabetes treatment", "type 2 diabetes treatment", False),
+    ("remote jobs in 2020", "remote jobs in 2024", False),
+    ("X", "X analysis", False),
+    ("The impacts of AI on Healthcare", "impact of AI in healthcare", True),
+    ("battery recycling", "recycling of batteries", True),
+    ("electric vehicle adoption", "electric vehicles adoption trends", True),
+)
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_graph(topic):
+    from core.workflow import run_research_team
+    state = run_research_team(topic, thread_id=f"bench_{uuid.uuid4().hex}")
+    hops = state.get("hops", [])
+    return {
+        "ok": bool(state.get("final_report")),
+        "hops": len(hops),
+        "prompt_tokens": sum(hop["prompt_tokens"] for hop in hops),
+    }
+
+def run_http(topic):
+    from app import app
+    response = app.test_client().post("/", data={"topic": topic})
+    return {"ok": response.status_code == 200 and b"Research Report" in response.data}
+
+def check_budget(limits, topic):
+    from core.budget import RunBudget
+    from core.workflow import run_research_team
+    summary = run_research_team(topic, thread_id=f"bench_{uuid.uuid4().hex}",
+                                budget=RunBudget(**limits))["run_summary"]
+    tokens = summary["prompt_tokens"] + summary["completion_tokens"]
+    over = [name for name, spent in (("max_llm_calls", summary["llm_calls"]), ("max_tokens", tokens))
+            if limits.get(name) and spent > limits[name]]
+    return {
+        "budget": limits,
+        "report": summary["report"],
+        "stop_reason": summary["stop_reason"],
+        "llm_calls": summary["llm_calls"],
+        "tokens": tokens,
+        "over": over,
+        # The writer always runs, so a budget below its cost is overrun by exactly that call
+        "ok": summary["report"] and (not over or summary["llm_calls"] == 1),
+    }
+
+def check_archive(stored, requested, expected):
+    from core.store import ReportStore
+    # The benchmark turns archive lookups off (RESEARCH_REPORT_MAX_AGE=0); these checks need them
+    store = ReportStore(os.environ["RESEARCH_REPORTS_DB"] + f".{uuid.uuid4().hex}", max_age=3600)
+    store.save(stored, f"report on {stored}")
+    record = store.lookup(requested)
+    return {
+        "stored": stored,
+        "requested": requested,
+        "match": record["match"] if record else None,
+        "score": record["score"] if record else None,
+        "ok": (record is not None) == expected,
+    }
+
+def run_scenario(mode, concurrency, topics):
+    runner = run_graph if mode == "graph" else run_http
+    latencies, outcomes = [], []
+
+    def timed(topic):
+        started = time.perf_counter()
+        try:
+            outcome = runner(topic)
+        except Exception as e:
+            outcome = {"ok": False, "error": str(e)}
+        latencies.append(time.perf_counter() - started)
+        outcomes.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, topics))
+    wall = time.perf_counter() - started
+    hops = [o["hops"] for o in outcomes if "hops" in o]
+    tokens = [o["prompt_tokens"] for o in outcomes if "prompt_tokens" in o]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "topics": len(topics),
+        "failures": sum(1 for o in outcomes if not o["ok"]),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(topics) / wall, 3) if wall else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+        "hops_mean": round(sum(hops) / len(hops), 2) if hops else None,
+        "prompt_tokens_mean": round(sum(tokens) / len(tokens), 1) if tokens else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", nargs="+", choices=("graph", "http"), default=["graph", "http"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--topics", type=int, default=16, help="topics per scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM seconds per call")
+    parser.add_argument("--output-tokens", type=int, default=300, help="fake LLM tokens per reply")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fake LLM failure probability")
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response cache and report archive enabled")
+    parser.add_argument("--check-budgets", action="store_true",
+                        help="run BUDGET_CHECKS instead of the scenarios; exit 1 if a run overspends")
+    parser.add_argument("--check-archive", action="store_true",
+                        help="run ARCHIVE_CHECKS instead of the scenarios; exit 1 if a topic gets the wrong report")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Configure the fake provider before anything from core is imported
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_OUTPUT_TOKENS"] = str(args.output_tokens)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    if not args.cache:
+        os.environ["RESEARCH_CACHE_SIZE"] = "0"
+        # Benchmark topics are near-duplicates of each other; never serve them from the report archive
+        os.environ["RESEARCH_REPORT_MAX_AGE"] = "0"
+    # HTTP runs still archive every report; keep the archive and job databases out of the working directory
+    scratch = tempfile.mkdtemp(prefix="bench_research_")
+    os.environ["RESEARCH_REPORTS_DB"] = os.path.join(scratch, "research_reports.db")
+    os.environ["RESEARCH_JOBS_DB"] = os.path.join(scratch, "research_jobs.db")
+    sys.path.insert(0, ROOT)
+    try:
+        return _run(args)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def _run(args):
+    checking = args.check_budgets or args.check_archive
+    # Import, compile and warm everything once so the first scenario isn't charged for it
+    for mode in ((["graph"] if args.check_budgets else []) if checking else args.mode):
+        (run_graph if mode == "graph" else run_http)("benchmark warm-up")
+
+    results = []
+    run_id = 0
+    if args.check_budgets:
+        for index, limits in enumerate(BUDGET_CHECKS):
+            result = check_budget(limits, f"budget check {index}")
+            results.append(result)
+            print(f"{'ok  ' if result['ok'] else 'FAIL'} {limits} calls={result['llm_calls']} "
+                  f"tokens={result['tokens']} stop={result['stop_reason']}", file=sys.stderr)
+    if args.check_archive:
+        for stored, requested, expected in ARCHIVE_CHECKS:
+            result = check_archive(stored, requested, expected)
+            results.append(result)
+            print(f"{'ok  ' if result['ok'] else 'FAIL'} {requested!r} -> {stored!r}: "
+                  f"{result['match'] or 'no match'} {result['score'] or ''}", file=sys.stderr)
+    for mode in ([] if checking else args.mode):
+        for concurrency in args.concurrency:
+            run_id += 1
+            topics = [f"benchmark topic {run_id}-{i}" for i in range(args.topics)]
+            result = run_scenario(mode, concurrency, topics)
+            results.append(result)
+            print(f"{mode:5} c={concurrency:<3} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                  f"{result['throughput_rps']} reports/s", file=sys.stderr)
+
+    document = {
+        "benchmark": "research_graph",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if checking and not all(result["ok"] for result in results):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
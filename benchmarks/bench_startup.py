@@ -0,0 +1,119 @@
+"""Benchmark cold start: import time and memory of the web apps and core modules.
+
+Each target is imported in a fresh interpreter, several times, and the
+median wall time, the resulting RSS and which heavy stacks (langgraph,
+langchain, the Gemini SDK, numpy) got loaded are written as one JSON
+document. "app+preload" imports app.py with RESEARCH_PRELOAD=1, i.e. what a
+gunicorn master does before forking; "app+first-run" adds the graph build a
+lazily started worker pays on its first request.
+
+    python benchmarks/bench_startup.py --repeat 5 --output startup.json
+    python benchmarks/bench_startup.py --check --max-import-seconds 0.5
+
+With --check the exit status is 1 when an entry point that should stay
+lazy (LAZY_TARGETS) loads the LLM/graph stack, or is slower to import than
+--max-import-seconds, so CI catches cold-start regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from bench_research import git_revision  # noqa: E402
+
+HEAVY_MODULES = ("langgraph", "langchain_core", "langchain_google_genai", "google.genai", "numpy")
+LLM_STACK = ("langgraph", "langchain_core", "langchain_google_genai", "google.genai")
+# Entry points that must not load the LLM/graph stack at import time
+LAZY_TARGETS = ("app", "asgi", "core.workflow", "core.llm", "core.metrics", "core.batch")
+DEFAULT_TARGETS = (
+    "app", "asgi", "app+preload", "app+first-run",
+    "core.workflow", "core.agents", "core.llm", "core.store", "core.metrics", "core.batch",
+)
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = r"""
+import json, resource, sys, time
+target, heavy = sys.argv[1], sys.argv[2].split(",")
+module = target.split("+")[0]
+started = time.perf_counter()
+__import__(module)
+imported = time.perf_counter() - started
+if target.endswith("+first-run"):
+    from core.workflow import research_team_registry
+    research_team_registry.warm()
+total = time.perf_counter() - started
+with open("/proc/self/statm") as f:
+    rss = int(f.read().split()[1]) * resource.getpagesize()
+print(json.dumps({"import_s": imported, "total_s": total, "rss_mb": rss / 2 ** 20,
+                  "loaded": [name for name in heavy if name in sys.modules]}))
+"""
+
+def probe(target):
+    env = {**os.environ, "PYTHONPATH": ROOT, "LLM_PROVIDER": "fake", "PYTHONDONTWRITEBYTECODE": "1"}
+    env.pop("RESEARCH_PRELOAD", None)
+    if target.endswith("+preload"):
+        env["RESEARCH_PRELOAD"] = "1"
+    output = subprocess.check_output([sys.executable, "-c", PROBE, target, ",".join(HEAVY_MODULES)],
+                                     cwd=ROOT, env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure(target, repeat):
+    samples = [probe(target) for _ in range(repeat)]
+    return {
+        "target": target,
+        "import_s": round(statistics.median(s["import_s"] for s in samples), 4),
+        "total_s": round(statistics.median(s["total_s"] for s in samples), 4),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "heavy_modules_loaded": samples[-1]["loaded"],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=list(DEFAULT_TARGETS),
+                        help="modules to import; suffix app with +preload or +first-run for those scenarios")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per target (median is reported)")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a lazy entry point regresses")
+    parser.add_argument("--max-import-seconds", type=float, default=1.0,
+                        help="import time allowed for lazy entry points with --check")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = [measure(target, args.repeat) for target in args.targets]
+    document = {
+        "benchmark": "startup",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if not args.check:
+        return 0
+    failures = []
+    for result in results:
+        if result["target"] not in LAZY_TARGETS:
+            continue
+        eager = [name for name in result["heavy_modules_loaded"] if name in LLM_STACK]
+        if eager:
+            failures.append(f"{result['target']} imports {', '.join(eager)}")
+        if result["import_s"] > args.max_import_seconds:
+            failures.append(f"{result['target']} took {result['import_s']}s to import")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,237 +1,350 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from .state import AgentState
-from .llm import create_llm
+from .context import ContextCompactor, count_tokens, estimate_tokens
+from .findings import FINDINGS_SPECS, FINDINGS_NEEDS, parse_findings, render_findings, findings_status
+from .routing import Router
+from .cache import CachedChain
+
+def _prompt_inputs(state, compactor, needs=(), **extra):
+    """Prompt variables: the topic plus only the findings in ``needs``, fitted to the context budget"""
+    blocks = compactor.fit_blocks(render_findings(state.get("findings"), needs))
+    return {
+        "research_topic": state["research_topic"],
+        "findings": "\n\n".join(blocks) or "None yet.",
+        **extra
+    }
+
+def _hop(agent, prompt, inputs, response=None):
+    """Token accounting for one agent hop, appended to state["hops"]"""
+    return {
+        "agent": agent,
+        "prompt_tokens": count_tokens(prompt.format_messages(**inputs)),
+        "completion_tokens": estimate_tokens(response.content) if response is not None else 0,
+        "error": response is None,
+        "cached": response is not None and response.response_metadata.get("cache_hit", False),
+        "latency": round(response.response_metadata.get("llm_latency", 0.0), 4) if response is not None else 0.0
+    }
+
+def _chain_agent(name, chain, compactor, succeed, fail, asynchronous=False, needs=()):
+    """Node calling ``chain`` on the topic and the findings in ``needs``;
+    ``succeed(state, inputs, response)`` and ``fail(state, inputs, error)`` build
+    its update. ``asynchronous`` returns a coroutine function using ``chain.ainvoke``."""
+    if asynchronous:
+        async def agent(state: AgentState) -> AgentState:
+            inputs = _prompt_inputs(state, compactor, needs)
+            try:
+                return succeed(state, inputs, await chain.ainvoke(inputs))
+            except Exception as e:
+                return fail(state, inputs, e)
+    else:
+        def agent(state: AgentState) -> AgentState:
+            inputs = _prompt_inputs(state, compactor, needs)
+            try:
+                return succeed(state, inputs, chain.invoke(inputs))
+            except Exception as e:
+                return fail(state, inputs, e)
+    agent.__name__ = agent.__qualname__ = name
+    return agent
 
 # Research Agent
-def create_research_agent(llm):
+def create_research_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     research_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a Research Specialist AI. Your role is to:\n1. Analyze the research topic thoroughly\n2. Identify key areas that need investigation\n3. Provide initial research findings and insights\n4. Suggest specific angles for deeper analysis\n\nFocus on providing comprehensive, accurate information and clear research directions.\nAlways structure your response with clear sections and bullet points.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
+        ("system", """You are a Research Specialist AI. Your role is to:\n1. Analyze the research topic thoroughly\n2. Identify key areas that need investigation\n3. Provide initial research findings and insights\n4. Suggest specific angles for deeper analysis\n\nFocus on providing comprehensive, accurate information and clear research directions.\nAlways structure your response with clear sections and bullet points.\n\n""" + FINDINGS_SPECS["research"].instructions()),
         ("human", "Research Topic: {research_topic}")
     ])
-    research_chain = research_prompt | llm
-    def research_agent(state: AgentState) -> AgentState:
-        try:
-            response = research_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            findings = {
-                "research_overview": response.content,
-                "key_areas": ["area1", "area2", "area3"],
-                "initial_insights": response.content[:500] + "..."
-            }
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "analyst",
-                "current_agent": "researcher",
-                "research_topic": state["research_topic"],
-                "findings": {**state.get("findings", {}), "research": findings},
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Research agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "analyst",
-                "current_agent": "researcher",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return research_agent
+    research_chain = CachedChain(research_prompt, llm, "researcher", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        findings = parse_findings(FINDINGS_SPECS["research"], response.content)
+        return {
+            "hops": [_hop("researcher", research_prompt, inputs, response)],
+            "next": "analyst",
+            "current_agent": "researcher",
+            "research_topic": state["research_topic"],
+            "findings": {"research": findings},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Research agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("researcher", research_prompt, inputs)],
+            "next": "analyst",
+            "current_agent": "researcher",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+    return _chain_agent("research_agent", research_chain, compactor, succeed, fail, asynchronous)
 
 # Analyst Agent
-def create_analyst_agent(llm):
+def create_analyst_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     analyst_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a Data Analyst AI. Your role is to:\n1. Analyze data and information provided by the research team\n2. Identify patterns, trends, and correlations\n3. Provide statistical insights and data-driven conclusions\n4. Suggest actionable recommendations based on analysis\n\nFocus on quantitative analysis, data interpretation, and evidence-based insights.\nUse clear metrics and concrete examples in your analysis.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
-        ("human", "Analyze the research findings for: {research_topic}")
+        ("system", """You are a Data Analyst AI. Your role is to:\n1. Analyze data and information provided by the research team\n2. Identify patterns, trends, and correlations\n3. Provide statistical insights and data-driven conclusions\n4. Suggest actionable recommendations based on analysis\n\nFocus on quantitative analysis, data interpretation, and evidence-based insights.\nUse clear metrics and concrete examples in your analysis.\n\n""" + FINDINGS_SPECS["analysis"].instructions()),
+        ("human", "Analyze the research findings for: {research_topic}\n\nFindings:\n{findings}")
     ])
-    analyst_chain = analyst_prompt | llm
-    def analyst_agent(state: AgentState) -> AgentState:
-        try:
-            response = analyst_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            analysis_findings = {
-                "analysis_summary": response.content,
-                "key_metrics": ["metric1", "metric2", "metric3"],
-                "recommendations": response.content.split("recommendations:")[-1] if "recommendations:" in response.content.lower() else "No specific recommendations found"
-            }
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "writer",
-                "current_agent": "analyst",
-                "research_topic": state["research_topic"],
-                "findings": {**state.get("findings", {}), "analysis": analysis_findings},
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Analyst agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "writer",
-                "current_agent": "analyst",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return analyst_agent
+    analyst_chain = CachedChain(analyst_prompt, llm, "analyst", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        analysis_findings = parse_findings(FINDINGS_SPECS["analysis"], response.content)
+        return {
+            "hops": [_hop("analyst", analyst_prompt, inputs, response)],
+            "next": "writer",
+            "current_agent": "analyst",
+            "research_topic": state["research_topic"],
+            "findings": {"analysis": analysis_findings},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Analyst agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("analyst", analyst_prompt, inputs)],
+            "next": "writer",
+            "current_agent": "analyst",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+    return _chain_agent("analyst_agent", analyst_chain, compactor, succeed, fail, asynchronous,
+                        FINDINGS_NEEDS["analyst"])
 
 # Writer Agent
-def create_writer_agent(llm):
+def create_writer_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     writer_prompt = ChatPromptTemplate.from_messages([
         ("system", """You are a Report Writer AI. Your role is to:\n1. Synthesize all research and analysis into a comprehensive report\n2. Create clear, professional documentation\n3. Ensure proper structure with executive summary, findings, and conclusions\n4. Make complex information accessible to various audiences\n\nFocus on clarity, completeness, and professional presentation.\nInclude specific examples and actionable insights.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
-        ("human", "Create a comprehensive report for: {research_topic}")
+        ("human", "Create a comprehensive report for: {research_topic}\n\nFindings:\n{findings}")
     ])
-    writer_chain = writer_prompt | llm
-    def writer_agent(state: AgentState) -> AgentState:
-        try:
-            response = writer_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "supervisor",
-                "current_agent": "writer",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": response.content
-            }
-        except Exception as e:
-            error_msg = f"Writer agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "supervisor",
-                "current_agent": "writer",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": f"Error generating report: {str(e)}"
-            }
+    writer_chain = CachedChain(writer_prompt, llm, "writer", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        return {
+            "hops": [_hop("writer", writer_prompt, inputs, response)],
+            "next": "supervisor",
+            "current_agent": "writer",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": response.content
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Writer agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("writer", writer_prompt, inputs)],
+            "next": "supervisor",
+            "current_agent": "writer",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+
+    # Callers that want the report as it is written pass configurable["on_token"]
+    if asynchronous:
+        async def writer_agent(state: AgentState, config: RunnableConfig = None) -> AgentState:
+            inputs = _prompt_inputs(state, compactor, FINDINGS_NEEDS["writer"])
+            on_token = ((config or {}).get("configurable") or {}).get("on_token")
+            try:
+                if on_token is None:
+                    return succeed(state, inputs, await writer_chain.ainvoke(inputs))
+                return succeed(state, inputs, await writer_chain.astream(inputs, on_token))
+            except Exception as e:
+                return fail(state, inputs, e)
+    else:
+        def writer_agent(state: AgentState, config: RunnableConfig = None) -> AgentState:
+            inputs = _prompt_inputs(state, compactor, FINDINGS_NEEDS["writer"])
+            on_token = ((config or {}).get("configurable") or {}).get("on_token")
+            try:
+                if on_token is None:
+                    return succeed(state, inputs, writer_chain.invoke(inputs))
+                return succeed(state, inputs, writer_chain.stream(inputs, on_token))
+            except Exception as e:
+                return fail(state, inputs, e)
     return writer_agent
 
 # Additional agents (archivist, translator, custom, supervisor) would be implemented similarly, following the same pattern.
 
 # Arsiv Agent (for research papers)
-def create_arsiv_agent(llm):
+def create_arsiv_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     arsiv_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an Arsiv Research Paper Agent. Your role is to:\n1. Search for relevant research papers on the given topic using Arsiv or similar sources.\n2. Return a list of relevant papers with titles, authors, and abstracts.\n3. Provide a brief summary of the most relevant findings.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
+        ("system", """You are an Arsiv Research Paper Agent. Your role is to:\n1. Search for relevant research papers on the given topic using Arsiv or similar sources.\n2. Return a list of relevant papers with titles, authors, and abstracts.\n3. Provide a brief summary of the most relevant findings.\n\n""" + FINDINGS_SPECS["arsiv"].instructions()),
         ("human", "Search for research papers on: {research_topic}")
     ])
-    arsiv_chain = arsiv_prompt | llm
-    def arsiv_agent(state: AgentState) -> AgentState:
-        try:
-            response = arsiv_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            arsiv_findings = {
-                "arsiv_summary": response.content,
-                "arsiv_papers": response.content[:500] + "..." if len(response.content) > 500 else response.content
-            }
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "translator",
-                "current_agent": "arsiv",
-                "research_topic": state["research_topic"],
-                "findings": {**state.get("findings", {}), "arsiv": arsiv_findings},
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Arsiv agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "translator",
-                "current_agent": "arsiv",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return arsiv_agent
+    arsiv_chain = CachedChain(arsiv_prompt, llm, "arsiv", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        arsiv_findings = parse_findings(FINDINGS_SPECS["arsiv"], response.content)
+        return {
+            "hops": [_hop("arsiv", arsiv_prompt, inputs, response)],
+            "next": "translator",
+            "current_agent": "arsiv",
+            "research_topic": state["research_topic"],
+            "findings": {"arsiv": arsiv_findings},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Arsiv agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("arsiv", arsiv_prompt, inputs)],
+            "next": "translator",
+            "current_agent": "arsiv",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+    return _chain_agent("arsiv_agent", arsiv_chain, compactor, succeed, fail, asynchronous)
 
 # Tavily Agent (for web search)
-def create_tavily_agent(llm):
+def create_tavily_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     tavily_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a Tavily Web Search Agent. Your role is to:\n1. Search the web for the latest and most relevant information on the research topic.\n2. Return a summary of key findings and important web sources.\n3. Provide URLs or references where possible.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
+        ("system", """You are a Tavily Web Search Agent. Your role is to:\n1. Search the web for the latest and most relevant information on the research topic.\n2. Return a summary of key findings and important web sources.\n3. Provide URLs or references where possible.\n\n""" + FINDINGS_SPECS["tavily"].instructions()),
         ("human", "Search the web for: {research_topic}")
     ])
-    tavily_chain = tavily_prompt | llm
-    def tavily_agent(state: AgentState) -> AgentState:
-        try:
-            response = tavily_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            tavily_findings = {
-                "tavily_summary": response.content,
-                "tavily_web_results": response.content[:500] + "..." if len(response.content) > 500 else response.content
-            }
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "translator",
-                "current_agent": "tavily",
-                "research_topic": state["research_topic"],
-                "findings": {**state.get("findings", {}), "tavily": tavily_findings},
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Tavily agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "translator",
-                "current_agent": "tavily",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return tavily_agent
+    tavily_chain = CachedChain(tavily_prompt, llm, "tavily", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        tavily_findings = parse_findings(FINDINGS_SPECS["tavily"], response.content)
+        return {
+            "hops": [_hop("tavily", tavily_prompt, inputs, response)],
+            "next": "translator",
+            "current_agent": "tavily",
+            "research_topic": state["research_topic"],
+            "findings": {"tavily": tavily_findings},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Tavily agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("tavily", tavily_prompt, inputs)],
+            "next": "translator",
+            "current_agent": "tavily",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+    return _chain_agent("tavily_agent", tavily_chain, compactor, succeed, fail, asynchronous)
 
 # Translator Agent (for translation and summarization)
-def create_translator_agent(llm):
+def create_translator_agent(llm, compactor=None, cache=None, fallback=None, asynchronous=False):
+    compactor = compactor or ContextCompactor()
     translator_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a Translator and Summarizer AI. Your role is to:\n1. Translate non-English content to English if needed.\n2. Summarize the provided content clearly and concisely.\n3. Highlight key insights from translated material.\n"""),
-        MessagesPlaceholder(variable_name="messages"),
-        ("human", "Translate and summarize the latest findings for: {research_topic}")
+        ("system", """You are a Translator and Summarizer AI. Your role is to:\n1. Translate non-English content to English if needed.\n2. Summarize the provided content clearly and concisely.\n3. Highlight key insights from translated material.\n\n""" + FINDINGS_SPECS["translator"].instructions()),
+        ("human", "Translate and summarize the latest findings for: {research_topic}\n\nFindings:\n{findings}")
     ])
-    translator_chain = translator_prompt | llm
-    def translator_agent(state: AgentState) -> AgentState:
+    translator_chain = CachedChain(translator_prompt, llm, "translator", cache, fallback=fallback)
+    def succeed(state, inputs, response):
+        translation_findings = parse_findings(FINDINGS_SPECS["translator"], response.content)
+        return {
+            "hops": [_hop("translator", translator_prompt, inputs, response)],
+            "next": "supervisor",
+            "current_agent": "translator",
+            "research_topic": state["research_topic"],
+            "findings": {"translator": translation_findings},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Translator agent error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("translator", translator_prompt, inputs)],
+            "next": "supervisor",
+            "current_agent": "translator",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+    return _chain_agent("translator_agent", translator_chain, compactor, succeed, fail, asynchronous,
+                        FINDINGS_NEEDS["translator"])
+
+# Gather Agent (runs independent source agents concurrently)
+def _failed_branch(name, error_msg):
+    return {"errors": [error_msg],
+            "hops": [{"agent": name, "prompt_tokens": 0, "completion_tokens": 0,
+                      "error": True, "cached": False, "latency": 0.0}]}
+
+def _gathered(state, updates):
+    """Merge the branch updates into one gather node update"""
+    errors, hops, findings = [], [], {}
+    for update in updates:
+        errors.extend(update.get("errors", []))
+        hops.extend(update.get("hops", []))
+        findings.update(update.get("findings", {}))
+    hops.append({"agent": "gather", "prompt_tokens": 0, "completion_tokens": 0,
+                 "error": not findings, "cached": False, "latency": 0.0})
+    return {
+        "errors": errors,
+        "hops": hops,
+        "next": "translator",
+        "current_agent": "gather",
+        "research_topic": state["research_topic"],
+        "findings": findings,
+        "final_report": state.get("final_report", "")
+    }
+
+def create_gather_agent(branches, timeout=None, asynchronous=False):
+    """Fan out to ``branches`` ({name: agent}) in parallel and merge their updates.
+
+    Each branch gets the same input state. A branch still running when
+    ``timeout`` seconds have passed is abandoned and reported as an error,
+    so one slow source cannot stall the report. With ``asynchronous`` the
+    branches are coroutine functions run as tasks on the event loop.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("RESEARCH_BRANCH_TIMEOUT", "60"))
+    if asynchronous:
+        async def gather_agent(state: AgentState) -> AgentState:
+            tasks = {name: asyncio.ensure_future(agent(state)) for name, agent in branches.items()}
+            _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            updates = []
+            for name, task in tasks.items():
+                if task in pending:
+                    updates.append(_failed_branch(name, f"{name} agent timed out after {timeout:g}s"))
+                elif task.exception() is not None:
+                    updates.append(_failed_branch(name, f"{name} agent error: {str(task.exception())}"))
+                else:
+                    updates.append(task.result())
+            return _gathered(state, updates)
+        return gather_agent
+
+    def gather_agent(state: AgentState) -> AgentState:
+        executor = ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="gather")
         try:
-            response = translator_chain.invoke({
-                "messages": state["messages"],
-                "research_topic": state["research_topic"]
-            })
-            translation_findings = {
-                "translator_summary": response.content,
-                "key_translated_insights": response.content[:500] + "..." if len(response.content) > 500 else response.content
-            }
-            return {
-                "messages": state["messages"] + [AIMessage(content=response.content)],
-                "next": "supervisor",
-                "current_agent": "translator",
-                "research_topic": state["research_topic"],
-                "findings": {**state.get("findings", {}), "translator": translation_findings},
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Translator agent error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "supervisor",
-                "current_agent": "translator",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return translator_agent
-
-def create_supervisor_agent(llm, members):
+            futures = {name: executor.submit(agent, state) for name, agent in branches.items()}
+            deadline = time.monotonic() + timeout
+            updates = []
+            for name, future in futures.items():
+                try:
+                    updates.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+                except FuturesTimeoutError:
+                    updates.append(_failed_branch(name, f"{name} agent timed out after {timeout:g}s"))
+                except Exception as e:
+                    updates.append(_failed_branch(name, f"{name} agent error: {str(e)}"))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return _gathered(state, updates)
+    return gather_agent
+
+def create_supervisor_agent(llm, members, compactor=None, router=None, cache=None, fallback=None,
+                            asynchronous=False, step_calls=None):
+    """``step_calls`` maps steps that make more than one LLM call (the gather stage) to their count,
+    so a run budget can price the step before it runs"""
+    compactor = compactor or ContextCompactor()
+    router = router or Router()
+    step_calls = step_calls or {}
     options = ["FINISH"] + members
     supervisor_prompt = ChatPromptTemplate.from_messages([
         ("system", f"""You are a Supervisor AI managing a research team. Your team members are:
@@ -243,7 +356,7 @@ def create_supervisor_agent(llm, members):
         3. Determine when the research is complete
         4. Maintain quality standards throughout the process
 
-        Given the conversation, determine the next step:
+        Given the team's progress, determine the next step:
         - If research is needed: route to \"researcher\"
         - If analysis is needed: route to \"analyst\"
         - If report writing is needed: route to \"writer\"
@@ -253,53 +366,105 @@ def create_supervisor_agent(llm, members):
 
         Respond with just the name of the next agent or \"FINISH\".
         """),
-        MessagesPlaceholder(variable_name="messages"),
-        ("human", "Current status: {current_agent} just completed their task for topic: {research_topic}")
+        ("human", "Current status: {current_agent} just completed their task for topic: {research_topic}\n\nProgress:\n{progress}")
     ])
-    supervisor_chain = supervisor_prompt | llm
+    supervisor_chain = CachedChain(supervisor_prompt, llm, "supervisor", cache, fallback=fallback)
 
-    def supervisor_agent(state: AgentState) -> AgentState:
-        try:
-            response = supervisor_chain.invoke({
-                "messages": state["messages"],
-                "current_agent": state.get("current_agent", "none"),
-                "research_topic": state["research_topic"]
-            })
-            next_agent = response.content.strip().lower()
-            if "finish" in next_agent or "complete" in next_agent:
-                next_step = "FINISH"
-            elif "research" in next_agent:
-                next_step = "researcher"
-            elif "analy" in next_agent:
+    def routed(state, next_step):
+        return {
+            "hops": [{"agent": "supervisor", "prompt_tokens": 0, "completion_tokens": 0,
+                      "error": False, "cached": False, "latency": 0.0}],
+            "supervisor_llm_calls": 0,
+            "next": next_step,
+            "current_agent": "supervisor",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+
+    def succeed(state, inputs, response):
+        next_agent = response.content.strip().lower()
+        if "finish" in next_agent or "complete" in next_agent:
+            next_step = "FINISH"
+        elif "research" in next_agent:
+            next_step = "researcher"
+        elif "analy" in next_agent:
+            next_step = "analyst"
+        elif "writ" in next_agent:
+            next_step = "writer"
+        else:
+            current = state.get("current_agent", "")
+            if current == "researcher":
                 next_step = "analyst"
-            elif "writ" in next_agent:
+            elif current == "analyst":
                 next_step = "writer"
+            elif current == "writer":
+                next_step = "FINISH"
             else:
-                current = state.get("current_agent", "")
-                if current == "researcher":
-                    next_step = "analyst"
-                elif current == "analyst":
-                    next_step = "writer"
-                elif current == "writer":
-                    next_step = "FINISH"
-                else:
-                    next_step = "researcher"
-            return {
-                "messages": state["messages"] + [AIMessage(content=f"Supervisor decision: Next agent is {next_step}")],
-                "next": next_step,
-                "current_agent": "supervisor",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-        except Exception as e:
-            error_msg = f"Supervisor error: {str(e)}"
-            return {
-                "messages": state["messages"] + [AIMessage(content=error_msg)],
-                "next": "FINISH",
-                "current_agent": "supervisor",
-                "research_topic": state["research_topic"],
-                "findings": state.get("findings", {}),
-                "final_report": state.get("final_report", "")
-            }
-    return supervisor_agent 
\ No newline at end of file
+                next_step = "researcher"
+        return {
+            "hops": [_hop("supervisor", supervisor_prompt, inputs, response)],
+            "supervisor_llm_calls": 1,
+            "next": next_step,
+            "current_agent": "supervisor",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+
+    def fail(state, inputs, e):
+        error_msg = f"Supervisor error: {str(e)}"
+        return {
+            "errors": [error_msg],
+            "hops": [_hop("supervisor", supervisor_prompt, inputs)],
+            "supervisor_llm_calls": 1,
+            "next": "FINISH",
+            "current_agent": "supervisor",
+            "research_topic": state["research_topic"],
+            "findings": {},
+            "final_report": state.get("final_report", "")
+        }
+
+    def steered(state, config, update):
+        # A run budget in configurable["budget"] may override the decision
+        budget = ((config or {}).get("configurable") or {}).get("budget")
+        if budget is None:
+            return update
+        # Price the step after this visit's own hop, which may include an LLM tie-break
+        visited = {**state, "hops": state.get("hops", []) + update["hops"]}
+        next_step = budget.steer(visited, update["next"], step_calls.get(update["next"], 1))
+        if next_step == update["next"]:
+            return update
+        return {**update, "next": next_step}
+
+    def forced(state, config):
+        """Step the budget imposes when it cannot afford the LLM tie-break, else None"""
+        budget = ((config or {}).get("configurable") or {}).get("budget")
+        return budget.steer(state) if budget is not None else None
+
+    # The routing plan covers the common path; the LLM only breaks ties
+    if asynchronous:
+        async def supervisor_agent(state: AgentState, config: RunnableConfig = None) -> AgentState:
+            # The plan picks the step first; the budget prices it in steered()
+            next_step = router.route(state) or forced(state, config)
+            if next_step is not None:
+                return steered(state, config, routed(state, next_step))
+            inputs = _prompt_inputs(state, compactor, current_agent=state.get("current_agent", "none"),
+                                    progress=findings_status(state))
+            try:
+                return steered(state, config, succeed(state, inputs, await supervisor_chain.ainvoke(inputs)))
+            except Exception as e:
+                return steered(state, config, fail(state, inputs, e))
+    else:
+        def supervisor_agent(state: AgentState, config: RunnableConfig = None) -> AgentState:
+            # The plan picks the step first; the budget prices it in steered()
+            next_step = router.route(state) or forced(state, config)
+            if next_step is not None:
+                return steered(state, config, routed(state, next_step))
+            inputs = _prompt_inputs(state, compactor, current_agent=state.get("current_agent", "none"),
+                                    progress=findings_status(state))
+            try:
+                return steered(state, config, succeed(state, inputs, supervisor_chain.invoke(inputs)))
+            except Exception as e:
+                return steered(state, config, fail(state, inputs, e))
+    return supervisor_agent
\ No newline at end of file
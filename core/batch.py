@@ -0,0 +1,135 @@
+"""Batch research: run many topics through one shared graph and stream results to JSONL.
+
+    python -m core.batch topics.txt --output reports.jsonl --workers 8 --max-llm-calls 16
+
+Re-running with the same output file skips topics that already finished, so
+an interrupted batch picks up where it stopped.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .llm import set_max_concurrent_llm_calls
+from .workflow import run_research_team, run_usage
+from .budget import RunBudget
+
+def load_topics(path: str):
+    """One topic per line; blank lines and # comments are skipped, duplicates dropped"""
+    topics = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#") and topic not in seen:
+                seen.add(topic)
+                topics.append(topic)
+    return topics
+
+def completed_topics(output_path: str):
+    """Topics that already have a successful record in an existing output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Partial line from a crash mid-write
+                continue
+            if record.get("status") == "ok":
+                done.add(record["topic"])
+    return done
+
+def _thread_id(topic: str) -> str:
+    # Stable per topic, so a checkpointed run can resume after a crash
+    return "batch_" + hashlib.sha1(topic.encode("utf-8")).hexdigest()
+
+def run_topic(topic: str, timeout: float = None, app=None):
+    started = time.monotonic()
+    deadline = started + timeout if timeout else None
+    should_stop = (lambda: time.monotonic() > deadline) if deadline else None
+    # The budget moves the run to the writer before the deadline; should_stop is the backstop
+    budget = RunBudget.from_env(max_seconds=timeout)
+    try:
+        state = run_research_team(topic, thread_id=_thread_id(topic), app=app, should_stop=should_stop,
+                                  resume=True, budget=budget)
+    except Exception as e:
+        return {"topic": topic, "status": "error", "error": str(e),
+                "elapsed_s": round(time.monotonic() - started, 3)}
+    if state.get("final_report"):
+        status = "ok"
+    elif deadline and time.monotonic() > deadline:
+        status = "timeout"
+    else:
+        status = "no_report"
+    return {
+        "topic": topic,
+        "status": status,
+        "report": state.get("final_report", ""),
+        "elapsed_s": round(time.monotonic() - started, 3),
+        "stop_reason": state.get("run_summary", {}).get("stop_reason"),
+        **run_usage(state)
+    }
+
+def run_batch(topics, output_path: str, workers: int = 4, topic_timeout: float = None,
+              max_llm_calls: int = None, app=None, log=None):
+    """Run ``topics`` concurrently, appending one JSON line per finished topic to ``output_path``.
+
+    Returns a summary with throughput (topics/minute) and token totals.
+    """
+    if max_llm_calls:
+        set_max_concurrent_llm_calls(max_llm_calls)
+    done = completed_topics(output_path)
+    pending = [topic for topic in topics if topic not in done]
+    totals = {"ok": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_calls": 0}
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        def work(topic):
+            record = run_topic(topic, timeout=topic_timeout, app=app)
+            with lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                totals["ok" if record["status"] == "ok" else "failed"] += 1
+                for key in ("prompt_tokens", "completion_tokens", "llm_calls"):
+                    totals[key] += record.get(key, 0)
+                if log is not None:
+                    finished = totals["ok"] + totals["failed"]
+                    log(f"[{finished}/{len(pending)}] {record['status']:9} {record['elapsed_s']:7.1f}s  {topic}")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            list(pool.map(work, pending))
+
+    elapsed = time.monotonic() - started
+    return {
+        "topics": len(topics),
+        "skipped": len(topics) - len(pending),
+        **totals,
+        "elapsed_s": round(elapsed, 3),
+        "topics_per_minute": round((totals["ok"] + totals["failed"]) / elapsed * 60, 2) if elapsed else None,
+        "tokens": totals["prompt_tokens"] + totals["completion_tokens"]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a research report for every topic in a file.")
+    parser.add_argument("topics", help="text file with one topic per line")
+    parser.add_argument("-o", "--output", default="reports.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="topics researched at once")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per topic")
+    parser.add_argument("--max-llm-calls", type=int, default=None, help="global cap on concurrent LLM calls")
+    args = parser.parse_args(argv)
+
+    log = lambda line: print(line, file=sys.stderr, flush=True)
+    summary = run_batch(load_topics(args.topics), args.output, workers=args.workers,
+                        topic_timeout=args.timeout, max_llm_calls=args.max_llm_calls, log=log)
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+
+DEFAULT_MAX_HOPS = 8
+DEFAULT_MAX_LLM_CALLS = 16
+# Assumed cost of one LLM call until calls have been observed
+PRIOR_CALL_TOKENS = 800
+PRIOR_CALL_SECONDS = 5.0
+
+# Stop reasons besides the budget limit names
+FINISHED = "finished"
+LOOP = "loop"
+STOPPED = "stopped"
+
+@dataclass(frozen=True)
+class RunBudget:
+    """Limits for one research run; None (or 0) disables a limit.
+
+    ``max_hops`` counts agent hops (the parallel gather stage is one hop,
+    supervisor visits are not counted); ``max_tokens`` counts prompt plus
+    completion tokens of calls that reached the LLM.
+    """
+    max_seconds: Optional[float] = None
+    max_llm_calls: Optional[int] = DEFAULT_MAX_LLM_CALLS
+    max_tokens: Optional[int] = None
+    max_hops: Optional[int] = DEFAULT_MAX_HOPS
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Defaults from RESEARCH_RUN_MAX_SECONDS / _MAX_LLM_CALLS / _MAX_TOKENS / _MAX_HOPS, then ``overrides``"""
+        values = {}
+        for field in fields(cls):
+            raw = os.getenv(f"RESEARCH_RUN_{field.name.upper()}")
+            if raw:
+                values[field.name] = float(raw) if field.name == "max_seconds" else int(raw)
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**values)
+
+    @classmethod
+    def from_params(cls, params):
+        """Budget from request parameters (max_seconds, max_llm_calls, max_tokens, max_hops);
+        blank or missing ones keep the environment defaults. Raises ValueError on bad values."""
+        overrides = {}
+        for field in fields(cls):
+            raw = params.get(field.name)
+            if raw is None or str(raw).strip() == "":
+                continue
+            value = float(raw)
+            if field.name != "max_seconds":
+                # int() would quietly truncate a JSON 2.5 and reject "2.0"; take whole numbers only
+                if not value.is_integer():
+                    raise ValueError(f"{field.name} must be a whole number")
+                value = int(value)
+            if value < 0:
+                raise ValueError(f"{field.name} must not be negative")
+            overrides[field.name] = value
+        return cls.from_env(**overrides)
+
+def _billed(state):
+    return [hop for hop in state.get("hops", []) if hop["prompt_tokens"] and not hop.get("cached")]
+
+def run_usage(state):
+    """Hop and LLM call counts for a finished run, with tokens for the calls that reached the LLM"""
+    hops = state.get("hops", [])
+    billed = _billed(state)
+    return {
+        "hops": len(hops),
+        "llm_calls": len(billed),
+        "cached_calls": sum(1 for hop in hops if hop.get("cached")),
+        "prompt_tokens": sum(hop["prompt_tokens"] for hop in billed),
+        "completion_tokens": sum(hop["completion_tokens"] for hop in billed)
+    }
+
+class CallPrior:
+    """Running average tokens and latency of one LLM call, learned from the runs in this process.
+
+    Budgets use it before a run has made a call of its own.
+    """
+
+    def __init__(self, tokens: float = PRIOR_CALL_TOKENS, seconds: float = PRIOR_CALL_SECONDS, alpha: float = 0.2):
+        self.tokens = tokens
+        self.seconds = seconds
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def estimate(self):
+        with self._lock:
+            return self.tokens, self.seconds
+
+    def observe(self, state):
+        with self._lock:
+            for hop in _billed(state):
+                self.tokens += self.alpha * (hop["prompt_tokens"] + hop["completion_tokens"] - self.tokens)
+                self.seconds += self.alpha * (hop.get("latency", 0.0) - self.seconds)
+
+call_prior = CallPrior()
+
+def _findings_signature(state):
+    findings = state.get("findings") or {}
+    return tuple(sorted((key, repr(value)) for key, value in findings.items())), bool(state.get("final_report"))
+
+class BudgetController:
+    """Steers one run's supervisor so a report is written within the budget.
+
+    The supervisor calls ``steer`` on every visit with the step it picked
+    and that step's LLM calls (the gather stage makes one per branch). If
+    the step followed by the writer would exceed a limit, or the proposed
+    agent already ran and no finding has changed since (a routing loop),
+    the run is sent to the writer, or finished if the writer has already
+    been tried. A FINISH before any report also goes to the writer first.
+    The writer itself always runs, so a budget too small for even the
+    writer alone is overrun by that one call. ``summary`` reports why the
+    run stopped.
+    """
+
+    def __init__(self, budget: RunBudget = None, prior: CallPrior = None):
+        self.budget = budget or RunBudget.from_env()
+        self.prior = prior or call_prior
+        self.started = time.monotonic()
+        self.reason = None
+        self.wrapped_up = False
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def _agent_hops(self, state) -> int:
+        # Every agent hop returns to the supervisor, which records a hop of its own;
+        # a trailing supervisor hop is the current (or final) visit, not an agent hop
+        hops = state.get("hops", [])
+        visits = sum(1 for hop in hops if hop["agent"] == "supervisor")
+        return visits - 1 if hops and hops[-1]["agent"] == "supervisor" else visits
+
+    def _estimates(self, state, usage):
+        """(tokens, seconds) of one more call, and (tokens, seconds) of the writer.
+
+        The writer's prompt is roughly every finding so far, i.e. the
+        completions already received. Costs come from this run's calls, or
+        from the process-wide prior before the run has made any.
+        """
+        calls = _billed(state)
+        if not calls:
+            tokens, seconds = self.prior.estimate()
+            return (tokens, seconds), (tokens, 2 * seconds)
+        per_call = (usage["prompt_tokens"] + usage["completion_tokens"]) / len(calls)
+        writer = usage["completion_tokens"] + max(hop["completion_tokens"] for hop in calls)
+        latencies = [hop.get("latency", 0.0) for hop in calls]
+        return (per_call, sum(latencies) / len(latencies)), (max(writer, per_call), 2 * max(latencies))
+
+    def exhausted(self, state, calls: int = 1):
+        """Name of the first limit that a step of ``calls`` LLM calls followed by the writer would exceed, else None"""
+        budget = self.budget
+        usage = run_usage(state)
+        (call_tokens, call_seconds), (writer_tokens, writer_seconds) = self._estimates(state, usage)
+        # Branches of one step run concurrently, so its calls cost one call's latency
+        seconds = (call_seconds if calls else 0.0) + writer_seconds
+        if budget.max_seconds and self.elapsed() + seconds > budget.max_seconds:
+            return "max_seconds"
+        if budget.max_llm_calls and usage["llm_calls"] + calls + 1 > budget.max_llm_calls:
+            return "max_llm_calls"
+        spent = usage["prompt_tokens"] + usage["completion_tokens"]
+        if budget.max_tokens and spent + calls * call_tokens + writer_tokens > budget.max_tokens:
+            return "max_tokens"
+        if budget.max_hops and self._agent_hops(state) + (1 if calls else 0) + 1 > budget.max_hops:
+            return "max_hops"
+        return None
+
+    def _wrap_up(self, state):
+        writer_tried = any(hop["agent"] == "writer" for hop in state.get("hops", []))
+        return "FINISH" if state.get("final_report") or writer_tried else "writer"
+
+    def steer(self, state, proposed=None, calls: int = 1):
+        """The next step for the supervisor: ``proposed`` unless the budget or a loop overrides it.
+
+        ``calls`` is the number of LLM calls ``proposed`` makes. Called with
+        ``proposed=None`` before the supervisor's own LLM tie-break (one
+        call), it returns None while the budget can afford that call.
+        """
+        signature = _findings_signature(state)
+        current = state.get("current_agent")
+        with self._lock:
+            if current and current != "supervisor":
+                self._seen[current] = signature
+            # The proposed agent would see exactly the findings it saw when it last finished
+            looping = proposed in self._seen and self._seen[proposed] == signature
+        if proposed == "FINISH":
+            # Never finish without a report while the writer is still untried
+            return proposed if state.get("final_report") else self._wrap_up(state)
+        # The writer is the step every budget leaves room for, so it adds nothing
+        reason = self.exhausted(state, 0 if proposed == "writer" else calls)
+        if reason is None and proposed is not None and looping:
+            reason = LOOP
+        if reason is None:
+            return proposed
+        step = self._wrap_up(state)
+        if step != proposed:
+            with self._lock:
+                self.reason = self.reason or reason
+                self.wrapped_up = True
+        return step
+
+    def overrun(self, steps: int) -> bool:
+        """Backstop for the stream loop: graph steps far past max_hops (an agent and a supervisor visit per hop)"""
+        return bool(self.budget.max_hops) and steps > 2 * (self.budget.max_hops + 1) + 1
+
+    def summary(self, state, stopped: bool = False, overrun: bool = False):
+        """Why and where the run stopped, with what it spent against its budget"""
+        if stopped:
+            reason = STOPPED
+        elif overrun:
+            reason = "max_hops"
+        else:
+            reason = self.reason or FINISHED
+        return {
+            "stop_reason": reason,
+            "report": bool(state.get("final_report")),
+            "wrapped_up": self.wrapped_up,
+            "elapsed_s": round(self.elapsed(), 3),
+            "agent_hops": self._agent_hops(state),
+            **run_usage(state),
+            "budget": asdict(self.budget)
+        }
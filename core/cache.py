@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.messages import AIMessage
+from .context import count_tokens
+from .governor import get_governor
+from .metrics import research_metrics
+
+DEFAULT_CACHE_SIZE = 512
+DEFAULT_CACHE_TTL = 3600
+
+def cache_key(model: str, temperature: float, role: str, prompt_text: str) -> str:
+    payload = json.dumps([model, temperature, role, prompt_text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def llm_identity(llm):
+    """(model, temperature) used to key cached responses for an LLM client"""
+    model = str(getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__)
+    cap = getattr(llm, "max_output_tokens", None)
+    # A capped client can return a truncated answer, so it must not share entries with an uncapped one
+    return (f"{model}@{cap}" if cap else model), getattr(llm, "temperature", None)
+
+class SQLiteCacheBackend:
+    """On-disk cache tier; one file can be shared by every worker process on a host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        return value, expires_at
+
+    def set(self, key: str, value: str, expires_at: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at)
+        )
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+class ResponseCache:
+    """Two-tier LLM response cache: an in-memory LRU with TTL in front of optional SQLite storage"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = SQLiteCacheBackend(path) if path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _memory_get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+        return None
+
+    def _disk_get(self, key: str):
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                with self._lock:
+                    self._store(key, *entry)
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                return entry[0]
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def get(self, key: str):
+        value = self._memory_get(key)
+        return value if value is not None else self._disk_get(key)
+
+    async def aget(self, key: str):
+        """``get`` for the event loop: the SQLite tier is read on a worker thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return self._disk_get(key)
+        return await asyncio.to_thread(self._disk_get, key)
+
+    def _memory_set(self, key: str, value: str) -> float:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        return expires_at
+
+    def set(self, key: str, value: str):
+        expires_at = self._memory_set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)
+
+    async def aset(self, key: str, value: str):
+        """``set`` for the event loop: the SQLite write and commit run on a worker thread"""
+        expires_at = self._memory_set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+class CachedChain:
+    """Drop-in for ``prompt | llm`` that caches responses by model, temperature, role and rendered prompt.
+
+    Calls that miss the cache go through the process-wide LLM governor.
+    With a ``fallback`` (profiles.LatencyFallback), calls move to its faster
+    model while the primary model is missing the role's latency SLO.
+    """
+
+    def __init__(self, prompt, llm, role: str, cache: ResponseCache = None, governor=None, fallback=None):
+        self.prompt = prompt
+        self.llm = llm
+        self.role = role
+        self.cache = cache
+        self.governor = governor or get_governor()
+        self.fallback = fallback
+
+    def _select(self):
+        if self.fallback is None:
+            return self.llm, False
+        llm, fell_back = self.fallback.choose(self.llm)
+        if fell_back:
+            research_metrics.inc("research_llm_fallbacks_total", agent=self.role)
+        return llm, fell_back
+
+    def _record(self, latency, fell_back):
+        # Latency includes governor queueing and retries: the time the agent actually waited
+        if self.fallback is not None and not fell_back:
+            self.fallback.record(latency)
+
+    @staticmethod
+    def _response(response, latency, fell_back):
+        if response is None:
+            return AIMessage(content="")
+        return AIMessage(content=response.content, response_metadata={
+            **response.response_metadata, "llm_latency": latency, "fallback": fell_back
+        })
+
+    def _timed(self, fn, prompt_value, fell_back, can_retry=None):
+        started = time.perf_counter()
+        try:
+            response = self.governor.call(fn, tokens=count_tokens(prompt_value.to_messages()), can_retry=can_retry)
+        finally:
+            latency = time.perf_counter() - started
+            self._record(latency, fell_back)
+        return self._response(response, latency, fell_back)
+
+    async def _atimed(self, fn, prompt_value, fell_back, can_retry=None):
+        started = time.perf_counter()
+        try:
+            response = await self.governor.acall(fn, tokens=count_tokens(prompt_value.to_messages()),
+                                                 can_retry=can_retry)
+        finally:
+            latency = time.perf_counter() - started
+            self._record(latency, fell_back)
+        return self._response(response, latency, fell_back)
+
+    def _key(self, prompt_value, llm):
+        model, temperature = llm_identity(llm)
+        rendered = json.dumps(
+            [[m.type, m.name, m.content] for m in prompt_value.to_messages()],
+            ensure_ascii=False, default=str
+        )
+        return cache_key(model, temperature, self.role, rendered)
+
+    def _expected(self, inputs):
+        """(prompt_value, model the call would go to, its cache key) without counting a fallback or probe"""
+        prompt_value = self.prompt.invoke(inputs)
+        expected = self.fallback.peek(self.llm)[0] if self.fallback is not None else self.llm
+        key = self._key(prompt_value, expected) if self.cache is not None else None
+        return prompt_value, expected, key
+
+    def _prepared(self, prompt_value, expected, key, content):
+        """(prompt_value, llm, fell_back, cache key, cached content) for one call"""
+        if content is not None:
+            return prompt_value, expected, False, key, content
+        # Only calls that reach a model count toward fallback use and probing
+        llm, fell_back = self._select()
+        if key is not None and llm is not expected:
+            key = self._key(prompt_value, llm)
+        return prompt_value, llm, fell_back, key, None
+
+    def _prepare(self, inputs):
+        prompt_value, expected, key = self._expected(inputs)
+        return self._prepared(prompt_value, expected, key, self.cache.get(key) if key is not None else None)
+
+    async def _aprepare(self, inputs):
+        # The disk tier is read off the event loop
+        prompt_value, expected, key = self._expected(inputs)
+        return self._prepared(prompt_value, expected, key, await self.cache.aget(key) if key is not None else None)
+
+    @staticmethod
+    def _cacheable(key, response) -> bool:
+        return key is not None and isinstance(response.content, str) and bool(response.content)
+
+    def _store(self, key, response):
+        if self._cacheable(key, response):
+            self.cache.set(key, response.content)
+        return response
+
+    async def _astore(self, key, response):
+        if self._cacheable(key, response):
+            await self.cache.aset(key, response.content)
+        return response
+
+    def invoke(self, inputs):
+        prompt_value, llm, fell_back, key, content = self._prepare(inputs)
+        if content is not None:
+            return AIMessage(content=content, response_metadata={"cache_hit": True})
+        return self._store(key, self._timed(lambda: llm.invoke(prompt_value), prompt_value, fell_back))
+
+    async def ainvoke(self, inputs):
+        prompt_value, llm, fell_back, key, content = await self._aprepare(inputs)
+        if content is not None:
+            return AIMessage(content=content, response_metadata={"cache_hit": True})
+        return await self._astore(key, await self._atimed(lambda: llm.ainvoke(prompt_value), prompt_value, fell_back))
+
+    def stream(self, inputs, on_token):
+        """Like invoke, but hands each chunk of text to ``on_token`` as the LLM produces it"""
+        prompt_value, llm, fell_back, key, content = self._prepare(inputs)
+        if content is not None:
+            on_token(content)
+            return AIMessage(content=content, response_metadata={"cache_hit": True})
+        emitted = []
+
+        def stream_once():
+            response = None
+            for chunk in llm.stream(prompt_value):
+                if isinstance(chunk.content, str) and chunk.content:
+                    emitted.append(True)
+                    on_token(chunk.content)
+                response = chunk if response is None else response + chunk
+            return response
+
+        # Once text has reached the caller a retry would repeat it, so only retry before that
+        return self._store(key, self._timed(stream_once, prompt_value, fell_back, can_retry=lambda: not emitted))
+
+    async def astream(self, inputs, on_token):
+        prompt_value, llm, fell_back, key, content = await self._aprepare(inputs)
+        if content is not None:
+            on_token(content)
+            return AIMessage(content=content, response_metadata={"cache_hit": True})
+        emitted = []
+
+        async def stream_once():
+            response = None
+            async for chunk in llm.astream(prompt_value):
+                if isinstance(chunk.content, str) and chunk.content:
+                    emitted.append(True)
+                    on_token(chunk.content)
+                response = chunk if response is None else response + chunk
+            return response
+
+        return await self._astore(key, await self._atimed(stream_once, prompt_value, fell_back,
+                                                          can_retry=lambda: not emitted))
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Process-wide cache configured by RESEARCH_CACHE_SIZE / _TTL / _PATH; None when size is 0"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                size = int(os.getenv("RESEARCH_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+                if size <= 0:
+                    return None
+                _default_cache = ResponseCache(
+                    max_entries=size,
+                    ttl=float(os.getenv("RESEARCH_CACHE_TTL", DEFAULT_CACHE_TTL)),
+                    path=os.getenv("RESEARCH_CACHE_PATH") or None
+                )
+    return _default_cache
+
+def reset_response_cache():
+    """Forget the process-wide cache, e.g. in a forked worker that must not reuse the parent's SQLite handle"""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = None
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langgraph.checkpoint.memory import MemorySaver
+
+DEFAULT_MAX_THREADS = 1000
+DEFAULT_CHECKPOINT_DB = "research_checkpoints.db"
+DEFAULT_COMPACT_INTERVAL = 3600
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer that keeps at most ``max_threads`` threads, evicting the least recently written"""
+
+    def __init__(self, max_threads: int = DEFAULT_MAX_THREADS, **kwargs):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self._recent = OrderedDict()
+        self._lock = threading.RLock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            self._recent[thread_id] = None
+            self._recent.move_to_end(thread_id)
+            while len(self._recent) > self.max_threads:
+                evicted, _ = self._recent.popitem(last=False)
+                super().delete_thread(evicted)
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            return super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._recent.pop(thread_id, None)
+            super().delete_thread(thread_id)
+
+    def thread_count(self) -> int:
+        with self._lock:
+            return len(self._recent)
+
+class ThreadedAsyncMixin:
+    """Async checkpointer methods for a sync-only saver, run on worker threads.
+
+    Lets the async graph path (astream/aget_state) use SqliteSaver without a
+    second, aiosqlite-based checkpointer.
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+def create_sqlite_saver(path: str):
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise RuntimeError("The sqlite checkpointer needs the langgraph-checkpoint-sqlite package") from e
+
+    class ThreadedSqliteSaver(ThreadedAsyncMixin, SqliteSaver):
+        pass
+
+    return ThreadedSqliteSaver(sqlite3.connect(path, check_same_thread=False, timeout=30))
+
+def compact_sqlite_checkpoints(path: str, max_threads: int = DEFAULT_MAX_THREADS, keep_per_thread: int = 1,
+                               vacuum: bool = True) -> dict:
+    """Drop old threads and superseded checkpoints from a SqliteSaver database.
+
+    Keeps the ``max_threads`` most recently written threads and, within each,
+    the newest ``keep_per_thread`` checkpoints (enough to resume a run).
+    Checkpoint IDs are time-ordered, so they double as recency.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        stale = conn.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id "
+            "ORDER BY MAX(checkpoint_id) DESC LIMIT -1 OFFSET ?", (max_threads,)
+        ).fetchall()
+        conn.executemany("DELETE FROM checkpoints WHERE thread_id = ?", stale)
+        conn.executemany("DELETE FROM writes WHERE thread_id = ?", stale)
+        superseded = conn.execute(
+            "DELETE FROM checkpoints WHERE rowid IN ("
+            "SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER ("
+            "PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS position "
+            "FROM checkpoints) WHERE position > ?)", (keep_per_thread,)
+        ).rowcount
+        conn.execute(
+            "DELETE FROM writes WHERE NOT EXISTS (SELECT 1 FROM checkpoints c "
+            "WHERE c.thread_id = writes.thread_id AND c.checkpoint_ns = writes.checkpoint_ns "
+            "AND c.checkpoint_id = writes.checkpoint_id)"
+        )
+        conn.commit()
+        if vacuum:
+            conn.execute("VACUUM")
+        return {"threads_removed": len(stale), "checkpoints_removed": superseded}
+    finally:
+        conn.close()
+
+# One compaction thread per database file in this process, however often the graph is rebuilt
+_compaction_threads = {}
+_compaction_lock = threading.Lock()
+
+def start_sqlite_compaction(path: str, interval: float, max_threads: int):
+    """Compact the checkpoint database every ``interval`` seconds on a daemon thread.
+
+    Returns the thread already compacting ``path`` in this process if there
+    is one; threads do not survive a fork, so a forked worker starts its own.
+    """
+    def compact_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                compact_sqlite_checkpoints(path, max_threads=max_threads)
+            except sqlite3.Error:
+                # Busy or locked; try again next interval
+                pass
+    key = os.path.abspath(path)
+    with _compaction_lock:
+        thread = _compaction_threads.get(key)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=compact_forever, name="checkpoint-compaction", daemon=True)
+        thread.start()
+        _compaction_threads[key] = thread
+    return thread
+
+def create_checkpointer(backend: str = None, path: str = None, max_threads: int = None):
+    """Checkpointer chosen by RESEARCH_CHECKPOINTER: "memory" (default, LRU-bounded) or "sqlite" """
+    backend = backend or os.getenv("RESEARCH_CHECKPOINTER", "memory")
+    if max_threads is None:
+        max_threads = int(os.getenv("RESEARCH_CHECKPOINT_MAX_THREADS", DEFAULT_MAX_THREADS))
+    if backend == "memory":
+        return BoundedMemorySaver(max_threads=max_threads)
+    if backend == "sqlite":
+        path = path or os.getenv("RESEARCH_CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB)
+        saver = create_sqlite_saver(path)
+        saver.setup()
+        interval = float(os.getenv("RESEARCH_CHECKPOINT_COMPACT_INTERVAL", DEFAULT_COMPACT_INTERVAL))
+        if interval > 0:
+            start_sqlite_compaction(path, interval, max_threads)
+        return saver
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
@@ -0,0 +1,46 @@
+import os
+
+DEFAULT_CONTEXT_TOKENS = 6000
+DEFAULT_MIN_CHARS = 300
+
+def message_text(message) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); cheap enough to run on every hop"""
+    return (len(text) + 3) // 4 if text else 0
+
+def count_tokens(messages) -> int:
+    # A few tokens of per-message overhead for role markers
+    return sum(estimate_tokens(message_text(m)) + 4 for m in messages)
+
+class ContextCompactor:
+    """Keeps the findings digest fed to an agent under a token budget.
+
+    Prompts are built from rendered findings blocks (see
+    core.findings.render_findings); ``fit_blocks`` truncates the longest
+    blocks until the digest fits ``max_tokens``, never below ``min_chars``
+    characters per block.
+    """
+
+    def __init__(self, max_tokens: int = None, min_chars: int = DEFAULT_MIN_CHARS):
+        if max_tokens is None:
+            max_tokens = int(os.getenv("RESEARCH_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS))
+        self.max_tokens = max_tokens
+        self.min_chars = min_chars
+
+    def fit_blocks(self, blocks) -> list:
+        """Text blocks cut down, longest first, until they fit the token budget"""
+        blocks = list(blocks)
+        overflow = sum(estimate_tokens(b) for b in blocks) - self.max_tokens
+        while overflow > 0 and blocks:
+            index = max(range(len(blocks)), key=lambda i: len(blocks[i]))
+            if len(blocks[index]) <= self.min_chars:
+                break
+            keep = max(self.min_chars, len(blocks[index]) - overflow * 4)
+            blocks[index] = blocks[index][:keep] + "..."
+            overflow = sum(estimate_tokens(b) for b in blocks) - self.max_tokens
+        return blocks
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORDS = (
+    "analysis", "data", "trend", "growth", "model", "evidence", "market", "policy", "study",
+    "impact", "risk", "cost", "adoption", "research", "signal", "survey", "benchmark", "source",
+    "increase", "decline", "region", "sector", "outcome", "metric", "review", "paper", "method"
+)
+
+_SECTION = re.compile(r"^([A-Z][A-Za-z ]+):\n- <item>", re.M)
+
+class FakeLLMError(RuntimeError):
+    """Failure injected by FakeResearchLLM"""
+
+class FakeResearchLLM(BaseChatModel):
+    """Deterministic offline chat model for benchmarks and local development.
+
+    The reply is derived from a hash of the prompt and ``seed``, so the same
+    prompt always gets the same text (and the same injected failure).
+    ``latency`` is slept once per call and ``token_latency`` per streamed chunk.
+    """
+
+    model: str = "fake-research"
+    temperature: float = 0.0
+    latency: float = 0.0
+    token_latency: float = 0.0
+    output_tokens: int = 200
+    failure_rate: float = 0.0
+    seed: int = 0
+    max_output_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-research"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(f"{m.type}:{m.content}" for m in messages)
+        digest = hashlib.sha256(f"{self.seed}:{self.model}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+        if rng.random() < self.failure_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+        # Roughly one token per word; follow the list sections the prompt asks for
+        # (core.findings format instructions), else an overview and recommendations
+        length = min(self.output_tokens, self.max_output_tokens or self.output_tokens)
+        words = [rng.choice(_WORDS) for _ in range(max(1, length - 4))]
+        middle = max(1, len(words) * 3 // 4)
+        overview = " ".join(words[:middle]).capitalize() + "."
+        headings = [h for h in dict.fromkeys(_SECTION.findall(prompt)) if h != "Summary"] or ["Recommendations"]
+        rest, sections = words[middle:], []
+        for index, heading in enumerate(headings):
+            share = rest[index * len(rest) // len(headings):(index + 1) * len(rest) // len(headings)] or ["n/a"]
+            items = [" ".join(share[i:i + 6]).capitalize() + "." for i in range(0, len(share), 6)]
+            sections.append(f"{heading}:\n" + "\n".join(f"- {item}" for item in items))
+        return f"Overview:\n{overview}\n\n" + "\n\n".join(sections)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._reply(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self._reply(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        for token in re.split(r"(\s+)", text):
+            if not token:
+                continue
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._reply(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._reply(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for token in re.split(r"(\s+)", text):
+            if not token:
+                continue
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,163 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+from typing_extensions import TypedDict
+
+# Typed findings, keyed in state["findings"] by FindingsSpec.key. The summary
+# field comes first so previews can take the first string value.
+
+class ResearchFindings(TypedDict):
+    research_overview: str
+    key_areas: List[str]
+    initial_insights: List[str]
+
+class ArsivFindings(TypedDict):
+    arsiv_summary: str
+    arsiv_papers: List[str]
+
+class TavilyFindings(TypedDict):
+    tavily_summary: str
+    tavily_web_results: List[str]
+
+class TranslatorFindings(TypedDict):
+    translator_summary: str
+    key_translated_insights: List[str]
+
+class AnalysisFindings(TypedDict):
+    analysis_summary: str
+    key_metrics: List[str]
+    recommendations: List[str]
+
+class Findings(TypedDict, total=False):
+    research: ResearchFindings
+    arsiv: ArsivFindings
+    tavily: TavilyFindings
+    translator: TranslatorFindings
+    analysis: AnalysisFindings
+
+@dataclass(frozen=True)
+class FindingsSpec:
+    """How one agent's reply is structured and parsed.
+
+    ``summary`` is the prose field; ``lists`` are (field, heading) pairs
+    whose sections are bullet lists.
+    """
+    key: str
+    summary: str
+    lists: Tuple[Tuple[str, str], ...]
+
+    def instructions(self) -> str:
+        """Output format appended to the agent's system prompt"""
+        sections = ["Summary:\n<one or two paragraphs>"]
+        sections += [f"{heading}:\n- <item>\n- <item>" for _, heading in self.lists]
+        return "Structure your response exactly as these sections, one bullet per item:\n\n" + "\n\n".join(sections)
+
+FINDINGS_SPECS = {
+    "research": FindingsSpec("research", "research_overview",
+                             (("key_areas", "Key areas"), ("initial_insights", "Insights"))),
+    "arsiv": FindingsSpec("arsiv", "arsiv_summary", (("arsiv_papers", "Papers"),)),
+    "tavily": FindingsSpec("tavily", "tavily_summary", (("tavily_web_results", "Sources"),)),
+    "translator": FindingsSpec("translator", "translator_summary", (("key_translated_insights", "Key insights"),)),
+    "analysis": FindingsSpec("analysis", "analysis_summary",
+                             (("key_metrics", "Key metrics"), ("recommendations", "Recommendations"))),
+}
+
+# Findings each consumer reads, as (findings key, fields); everything else stays out of its prompt
+FINDINGS_NEEDS = {
+    "translator": (
+        ("research", ("research_overview", "key_areas")),
+        ("arsiv", ("arsiv_summary", "arsiv_papers")),
+        ("tavily", ("tavily_summary", "tavily_web_results")),
+    ),
+    "analyst": (
+        ("research", ("key_areas", "initial_insights")),
+        ("translator", ("translator_summary", "key_translated_insights")),
+    ),
+    "writer": (
+        ("research", ("research_overview", "key_areas")),
+        ("translator", ("key_translated_insights",)),
+        ("analysis", ("analysis_summary", "key_metrics", "recommendations")),
+        ("arsiv", ("arsiv_papers",)),
+        ("tavily", ("tavily_web_results",)),
+    ),
+}
+
+_SUMMARY_HEADINGS = ("summary", "overview", "executive summary")
+# Markdown heading, bold label or "Label:" line, optionally followed by inline text
+_HEADING = re.compile(r"^\s*(?:#{1,6}\s*)?[*_]{0,2}([A-Za-z][A-Za-z /&'-]{1,48}?)[*_]{0,2}\s*(?::[*_]{0,2}\s*(.*)|$)")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)")
+
+def _heading_key(text: str) -> str:
+    return " ".join(text.lower().replace("_", " ").split())
+
+def _split_sections(text: str, fields: dict) -> dict:
+    """{field: [lines]} for the lines under each recognised heading; "" holds unlabelled lines"""
+    sections, current = {"": []}, ""
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        field = fields.get(_heading_key(match.group(1))) if match else None
+        if field is not None:
+            current = field
+            sections.setdefault(current, [])
+            if match.group(2):
+                sections[current].append(match.group(2))
+            continue
+        sections[current].append(line)
+    return sections
+
+def _items(lines) -> List[str]:
+    bullets = [m.group(1).strip() for m in map(_BULLET.match, lines) if m]
+    items = bullets or [line.strip() for line in lines]
+    return [item.strip("*_ ") for item in items if item.strip("*_ ")]
+
+def _prose(lines) -> str:
+    return "\n".join(lines).strip()
+
+def parse_findings(spec: FindingsSpec, text: str) -> dict:
+    """Typed findings for ``spec`` from a reply following ``spec.instructions()``.
+
+    Sections may come in any order and with markdown decoration; list
+    sections missing from the reply are empty, and without a summary
+    section the unlabelled text (or the whole reply) is the summary.
+    """
+    fields = {heading: spec.summary for heading in _SUMMARY_HEADINGS}
+    fields.update({_heading_key(heading): field for field, heading in spec.lists})
+    fields.update({_heading_key(field): field for field, _ in spec.lists})
+    sections = _split_sections(text, fields)
+    summary = _prose(sections.get(spec.summary, [])) or _prose(sections[""]) or text.strip()
+    findings = {spec.summary: summary}
+    for field, _ in spec.lists:
+        findings[field] = _items(sections.get(field, []))
+    return findings
+
+def _render_value(value) -> str:
+    if isinstance(value, list):
+        return "\n".join(f"- {item}" for item in value)
+    return str(value)
+
+def render_findings(findings: dict, needs) -> List[str]:
+    """One text block per needed findings entry, holding only the needed non-empty fields"""
+    blocks = []
+    for key, fields in needs:
+        entry = (findings or {}).get(key) or {}
+        parts = [f"{field.replace('_', ' ').capitalize()}:\n{_render_value(entry[field])}"
+                 for field in fields if entry.get(field)]
+        if parts:
+            blocks.append(f"[{key}]\n" + "\n".join(parts))
+    return blocks
+
+def findings_status(state) -> str:
+    """Short progress report for the supervisor: which findings exist and the latest errors"""
+    findings = state.get("findings") or {}
+    lines = []
+    for key, spec in FINDINGS_SPECS.items():
+        entry = findings.get(key) or {}
+        if entry.get(spec.summary):
+            counts = ", ".join(f"{len(entry.get(field) or [])} {heading.lower()}" for field, heading in spec.lists)
+            lines.append(f"- {key}: done ({counts})")
+        else:
+            lines.append(f"- {key}: missing")
+    lines.append(f"- final report: {'written' if state.get('final_report') else 'not written'}")
+    for error in (state.get("errors") or [])[-2:]:
+        lines.append(f"- error: {error}")
+    return "\n".join(lines)
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+DEFAULT_MAX_CONCURRENCY = 32
+
+class LLMUnavailableError(RuntimeError):
+    """The governor refused an LLM call because the provider is considered down"""
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+# Substrings (matched case-insensitively against the exception type and message)
+# that mark provider overload or outage rather than a bad request
+_RETRYABLE_MARKERS = (
+    "429", "resourceexhausted", "resource exhausted", "rate limit", "ratelimit", "quota",
+    "timeout", "timed out", "deadline", "503", "unavailable", "overloaded", "connection"
+)
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+class TokenBucket:
+    """Refilling token bucket; ``reserve`` books capacity and returns how long to wait for it"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going into debt keeps waiters in arrival order
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+class LLMGovernor:
+    """Shared gate for every LLM call in the process.
+
+    Combines request/s and tokens/min token buckets, an AIMD concurrency
+    limit that halves on 429s/timeouts and creeps back up on success,
+    jittered exponential retries paid for from a retry budget, and a
+    circuit breaker that fails fast after repeated provider failures.
+    """
+
+    def __init__(self, requests_per_second: float = None, tokens_per_minute: float = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, min_concurrency: int = 1,
+                 max_retries: int = 3, retry_ratio: float = 0.2, base_delay: float = 0.5, max_delay: float = 20.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second)) if requests_per_second else None
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.retry_ratio = retry_ratio
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._cond = threading.Condition()
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        # Each call earns retry_ratio retries, up to max_retry_tokens banked
+        self._max_retry_tokens = 10.0
+        self._retry_tokens = self._max_retry_tokens
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._stats = {
+            "calls": 0, "successes": 0, "failures": 0, "throttled": 0, "retries": 0,
+            "retries_denied": 0, "rejected": 0, "queue_wait_seconds_total": 0.0, "queue_wait_seconds_max": 0.0
+        }
+
+    def set_max_concurrency(self, limit: int):
+        with self._cond:
+            self.max_concurrency = limit
+            self._limit = float(limit)
+            self._cond.notify_all()
+
+    def call(self, fn, tokens: int = 0, can_retry=None):
+        """Run ``fn()`` under the governor's limits, retrying overload errors.
+
+        ``can_retry()``, if given, is consulted before each retry, e.g. to
+        avoid replaying a stream that already emitted output.
+        """
+        attempt = 0
+        while True:
+            trial = self._check_circuit()
+            self._wait_for_slot(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                self._release(e, trial)
+                if not self._should_retry(e, attempt, can_retry):
+                    raise
+                attempt += 1
+                time.sleep(self._backoff(attempt))
+                continue
+            self._release(None, trial)
+            return result
+
+    async def acall(self, fn, tokens: int = 0, can_retry=None):
+        """Async ``call``: ``fn()`` returns an awaitable, and every wait yields to the event loop"""
+        attempt = 0
+        while True:
+            trial = self._check_circuit()
+            try:
+                await self._await_slot(tokens)
+            except asyncio.CancelledError:
+                # Cancelled while queued: no slot is held, but the half-open trial must be handed back
+                self._end_trial(trial)
+                raise
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self._abandon(trial)
+                raise
+            except Exception as e:
+                self._release(e, trial)
+                if not self._should_retry(e, attempt, can_retry):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._release(None, trial)
+            return result
+
+    def metrics(self) -> dict:
+        with self._cond:
+            calls = self._stats["calls"]
+            return {
+                **self._stats,
+                "queue_wait_seconds_avg": self._stats["queue_wait_seconds_total"] / calls if calls else 0.0,
+                "in_flight": self._in_flight,
+                "concurrency_limit": int(self._limit),
+                "circuit": self._circuit_state()
+            }
+
+    def _circuit_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def _check_circuit(self) -> bool:
+        """Raise if the circuit is open; returns True when this call is the half-open trial"""
+        with self._cond:
+            state = self._circuit_state()
+            if state == "closed":
+                return False
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+        raise CircuitOpenError("LLM provider circuit is open after repeated failures; failing fast")
+
+    def _reserve(self, tokens: int) -> float:
+        delay = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def _wait_for_slot(self, tokens: int):
+        started = time.monotonic()
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._acquired(started)
+
+    async def _await_slot(self, tokens: int):
+        started = time.monotonic()
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        # Polled rather than waited on, so hundreds of queued coroutines don't each hold a thread
+        poll = 0.005
+        while True:
+            with self._cond:
+                if self._in_flight < int(self._limit):
+                    self._acquired(started)
+                    return
+            await asyncio.sleep(poll)
+            poll = min(0.05, poll * 2)
+
+    def _acquired(self, started: float):
+        self._in_flight += 1
+        waited = time.monotonic() - started
+        self._stats["calls"] += 1
+        self._stats["queue_wait_seconds_total"] += waited
+        self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], waited)
+        self._retry_tokens = min(self._max_retry_tokens, self._retry_tokens + self.retry_ratio)
+
+    def _end_trial(self, trial: bool):
+        if trial:
+            with self._cond:
+                self._trial_in_flight = False
+
+    def _abandon(self, trial: bool):
+        """Free a slot whose call was cancelled, without counting it as a success or failure"""
+        with self._cond:
+            self._in_flight -= 1
+            if trial:
+                self._trial_in_flight = False
+            self._cond.notify_all()
+
+    def _release(self, error, trial: bool):
+        with self._cond:
+            self._in_flight -= 1
+            if trial:
+                self._trial_in_flight = False
+            if error is None:
+                self._stats["successes"] += 1
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+                self._consecutive_failures = 0
+                self._opened_at = None
+            else:
+                self._stats["failures"] += 1
+                if is_retryable(error):
+                    self._stats["throttled"] += 1
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+                    self._consecutive_failures += 1
+                    if trial or self._consecutive_failures >= self.failure_threshold:
+                        self._opened_at = time.monotonic()
+            self._cond.notify_all()
+
+    def _should_retry(self, error, attempt: int, can_retry) -> bool:
+        if isinstance(error, LLMUnavailableError) or not is_retryable(error):
+            return False
+        if attempt >= self.max_retries or (can_retry is not None and not can_retry()):
+            return False
+        with self._cond:
+            if self._opened_at is not None or self._retry_tokens < 1:
+                self._stats["retries_denied"] += 1
+                return False
+            self._retry_tokens -= 1
+            self._stats["retries"] += 1
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from concurrent requests from lining up
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+def _env_float(name: str):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor() -> LLMGovernor:
+    """Process-wide governor configured from RESEARCH_LLM_* environment variables"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = LLMGovernor(
+                    requests_per_second=_env_float("RESEARCH_LLM_RPS"),
+                    tokens_per_minute=_env_float("RESEARCH_LLM_TPM"),
+                    max_concurrency=int(os.getenv("RESEARCH_MAX_LLM_CALLS") or DEFAULT_MAX_CONCURRENCY),
+                    max_retries=int(os.getenv("RESEARCH_LLM_MAX_RETRIES", "3")),
+                    failure_threshold=int(os.getenv("RESEARCH_LLM_BREAKER_FAILURES", "5")),
+                    reset_timeout=float(os.getenv("RESEARCH_LLM_BREAKER_RESET", "30"))
+                )
+    return _governor
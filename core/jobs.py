@@ -0,0 +1,152 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+DEFAULT_JOBS_DB = "research_jobs.db"
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_QUEUE_DEPTH = 50
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at its depth limit"""
+
+class JobStore:
+    """SQLite-backed job records, so queued and running jobs survive a restart"""
+
+    COLUMNS = ("id", "topic", "status", "created_at", "started_at", "finished_at", "report", "error")
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("RESEARCH_JOBS_DB", DEFAULT_JOBS_DB)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, topic TEXT NOT NULL, status TEXT NOT NULL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, report TEXT, error TEXT)"
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, topic: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, topic, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, topic, QUEUED, time.time())
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def unfinished(self):
+        """(id, topic) of jobs that were queued or running, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, topic FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+
+class JobQueue:
+    """Bounded queue of research jobs executed by a pool of background workers.
+
+    ``runner(job_id, topic, should_stop)`` performs one run and returns the
+    final graph state; ``should_stop()`` turns True once the job is cancelled.
+    """
+
+    def __init__(self, runner, store: JobStore = None, workers: int = None, max_depth: int = None):
+        self.runner = runner
+        self.store = store or JobStore()
+        self.workers = workers or int(os.getenv("RESEARCH_JOB_WORKERS", DEFAULT_JOB_WORKERS))
+        self.max_depth = max_depth or int(os.getenv("RESEARCH_JOB_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH))
+        self._queue = queue.Queue()
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Re-enqueue jobs left over from a previous process and start the workers"""
+        if self._threads:
+            return self
+        for job_id, topic in self.store.unfinished():
+            self.store.update(job_id, status=QUEUED, started_at=None)
+            self._queue.put((job_id, topic))
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"research-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, topic: str) -> str:
+        with self._lock:
+            if self._queue.qsize() >= self.max_depth:
+                raise QueueFullError(f"Job queue is full ({self.max_depth} jobs waiting)")
+            job_id = uuid.uuid4().hex
+            self.store.create(job_id, topic)
+            self._queue.put((job_id, topic))
+        return job_id
+
+    def get(self, job_id: str):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it has already finished"""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return False
+        with self._lock:
+            self._cancelled.add(job_id)
+        if job["status"] == QUEUED:
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        return True
+
+    def _work(self):
+        while True:
+            job_id, topic = self._queue.get()
+            try:
+                self._run(job_id, topic)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id, topic):
+        try:
+            if self._is_cancelled(job_id):
+                return
+            self.store.update(job_id, status=RUNNING, started_at=time.time())
+            final_state = self.runner(job_id, topic, lambda: self._is_cancelled(job_id))
+            if self._is_cancelled(job_id):
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+            elif final_state and final_state.get("final_report"):
+                self.store.update(job_id, status=DONE, finished_at=time.time(), report=final_state["final_report"])
+            else:
+                errors = (final_state or {}).get("errors") or ["No report generated."]
+                self.store.update(job_id, status=FAILED, finished_at=time.time(), error=errors[-1])
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, finished_at=time.time(), error=str(e))
+        finally:
+            with self._lock:
+                self._cancelled.discard(job_id)
+
+    def _is_cancelled(self, job_id) -> bool:
+        with self._lock:
+            return job_id in self._cancelled
@@ -1,11 +1,89 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+import threading
+from typing import TYPE_CHECKING
+from .governor import get_governor, DEFAULT_MAX_CONCURRENCY
 
-def create_llm(temperature: float = 0.1, model: str = "gemini-1.5-flash") -> ChatGoogleGenerativeAI:
-    """Create a configured Gemini LLM instance"""
+# The provider SDKs are imported by their factories, so importing this module stays cheap
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+DEFAULT_TEMPERATURE = 0.1
+DEFAULT_PROVIDER = "google"
+
+_llm_pool = {}
+_llm_pool_lock = threading.Lock()
+
+def _create_google_llm(model: str, temperature: float, max_output_tokens: int = None) -> "ChatGoogleGenerativeAI":
+    from langchain_google_genai import ChatGoogleGenerativeAI
     google_api_key = os.getenv("GOOGLE_API_KEY")
     return ChatGoogleGenerativeAI(
         model=model,
         temperature=temperature,
+        max_output_tokens=max_output_tokens,
         google_api_key=google_api_key
-    ) 
\ No newline at end of file
+    )
+
+def _create_fake_llm(model: str, temperature: float, max_output_tokens: int = None) -> "BaseChatModel":
+    from .fake_llm import FakeResearchLLM
+    return FakeResearchLLM(
+        # Prefixed so cached fake responses never collide with real ones
+        model=f"fake:{model}",
+        temperature=temperature,
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+        token_latency=float(os.getenv("FAKE_LLM_TOKEN_LATENCY", "0")),
+        output_tokens=int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "200")),
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        max_output_tokens=max_output_tokens
+    )
+
+# name -> factory(model, temperature[, max_output_tokens]); "fake" runs offline for benchmarks and development
+LLM_PROVIDERS = {
+    "google": _create_google_llm,
+    "fake": _create_fake_llm,
+}
+
+def register_llm_provider(name: str, factory):
+    LLM_PROVIDERS[name] = factory
+
+def create_llm(temperature: float = DEFAULT_TEMPERATURE, model: str = DEFAULT_MODEL,
+               provider: str = None, max_output_tokens: int = None) -> "BaseChatModel":
+    """Create a configured LLM instance from LLM_PROVIDER (Gemini by default)"""
+    provider = provider or os.getenv("LLM_PROVIDER", DEFAULT_PROVIDER)
+    if provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    # Only passed when set, so providers registered with the two-argument signature keep working
+    extra = {"max_output_tokens": max_output_tokens} if max_output_tokens else {}
+    return LLM_PROVIDERS[provider](model=model, temperature=temperature, **extra)
+
+def resolve_llm_config(model: str = None, temperature: float = None):
+    """Fill in model/temperature from RESEARCH_MODEL / RESEARCH_TEMPERATURE when not given"""
+    if model is None:
+        model = os.getenv("RESEARCH_MODEL", DEFAULT_MODEL)
+    if temperature is None:
+        temperature = float(os.getenv("RESEARCH_TEMPERATURE", DEFAULT_TEMPERATURE))
+    return model, temperature
+
+def get_llm(temperature: float = None, model: str = None, max_output_tokens: int = None) -> "BaseChatModel":
+    """Return the shared LLM client for a model/temperature/output cap, creating it once per process"""
+    key = (*resolve_llm_config(model, temperature), max_output_tokens)
+    llm = _llm_pool.get(key)
+    if llm is None:
+        with _llm_pool_lock:
+            llm = _llm_pool.get(key)
+            if llm is None:
+                llm = create_llm(temperature=key[1], model=key[0], max_output_tokens=max_output_tokens)
+                _llm_pool[key] = llm
+    return llm
+
+def discard_llm(temperature: float = None, model: str = None, max_output_tokens: int = None):
+    """Drop a pooled client so the next get_llm call reconnects"""
+    key = (*resolve_llm_config(model, temperature), max_output_tokens)
+    with _llm_pool_lock:
+        _llm_pool.pop(key, None)
+
+def set_max_concurrent_llm_calls(limit: int = None):
+    """Cap in-flight LLM calls across the whole process (the governor's concurrency ceiling)"""
+    get_governor().set_max_concurrency(limit or DEFAULT_MAX_CONCURRENCY)
\ No newline at end of file
@@ -0,0 +1,226 @@
+import inspect
+import json
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1e3, 4e3, 16e3, 64e3, 256e3, 1e6, 4e6, 16e6)
+COUNT_BUCKETS = (1, 2, 4, 8, 12, 16, 24, 32, 64)
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+    return "{" + pairs + "}"
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+        self._collectors = []
+
+    def describe(self, name: str, kind: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            self._families.setdefault(name, {"kind": kind, "help": help_text, "buckets": buckets, "series": {}})
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self._lock:
+            series = self._families[name]["series"]
+            key = tuple(sorted(labels.items()))
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._families[name]["series"][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            family = self._families[name]
+            key = tuple(sorted(labels.items()))
+            histogram = family["series"].get(key)
+            if histogram is None:
+                histogram = family["series"][key] = {"buckets": [0] * len(family["buckets"]), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(family["buckets"]):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def add_collector(self, prefix: str, collect):
+        """Export the numeric values of ``collect()`` (a dict) as ``<prefix>_<key>`` gauges at scrape time"""
+        self._collectors.append((prefix, collect))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, family in sorted(self._families.items()):
+                lines.append(f"# HELP {name} {family['help']}")
+                lines.append(f"# TYPE {name} {family['kind']}")
+                for key, value in sorted(family["series"].items()):
+                    if family["kind"] != "histogram":
+                        lines.append(f"{name}{_label_text(key)} {value:g}")
+                        continue
+                    for bound, count in zip(family["buckets"], value["buckets"]):
+                        lines.append(f"{name}_bucket{_label_text(key + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_label_text(key + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{_label_text(key)} {value['sum']:g}")
+                    lines.append(f"{name}_count{_label_text(key)} {value['count']}")
+        for prefix, collect in self._collectors:
+            try:
+                values = collect() or {}
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value:g}")
+        return "\n".join(lines) + "\n"
+
+research_metrics = MetricsRegistry()
+research_metrics.describe("research_node_duration_seconds", "histogram", "Wall time per graph node execution")
+research_metrics.describe("research_llm_latency_seconds", "histogram", "LLM call latency per agent (cache hits excluded)")
+research_metrics.describe("research_prompt_tokens_total", "counter", "Estimated prompt tokens sent per agent")
+research_metrics.describe("research_completion_tokens_total", "counter", "Estimated completion tokens received per agent")
+research_metrics.describe("research_llm_calls_total", "counter", "Agent LLM calls by outcome (ok, cached, error)")
+research_metrics.describe("research_llm_fallbacks_total", "counter", "Calls moved to a role's fallback model over its latency SLO")
+research_metrics.describe("research_state_bytes", "histogram", "Serialized graph state size entering a node", SIZE_BUCKETS)
+research_metrics.describe("research_node_errors_total", "counter", "Node executions that raised")
+research_metrics.describe("research_runs_total", "counter", "Finished research runs by outcome")
+research_metrics.describe("research_run_stops_total", "counter", "Finished research runs by stop reason")
+research_metrics.describe("research_run_duration_seconds", "histogram", "Wall time per research run")
+research_metrics.describe("research_run_hops", "histogram", "Agent hops per research run", COUNT_BUCKETS)
+research_metrics.describe("research_run_llm_calls", "histogram", "LLM calls per research run", COUNT_BUCKETS)
+
+def state_size_bytes(state) -> int:
+    return len(json.dumps(state, default=str, ensure_ascii=False).encode("utf-8"))
+
+class RunTrace:
+    """Per-run timeline of node executions, exportable as JSON or Chrome trace events"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, duration: float, **args):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                "args": args
+            })
+
+    def to_chrome(self) -> dict:
+        """Trace Event Format, loadable in chrome://tracing or Perfetto"""
+        threads = {}
+        events = []
+        for span in self.spans:
+            tid = threads.setdefault(span["thread"], len(threads) + 1)
+            events.append({
+                "name": span["name"], "cat": "node", "ph": "X", "pid": 1, "tid": tid,
+                "ts": span["start_ms"] * 1000, "dur": span["duration_ms"] * 1000, "args": span["args"]
+            })
+        for thread, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": self.run_id}}
+
+    def write(self, path: str, fmt: str = "chrome"):
+        document = self.to_chrome() if fmt == "chrome" else {"run_id": self.run_id, "spans": self.spans}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, default=str)
+
+def _accepts_config(node) -> bool:
+    try:
+        return "config" in inspect.signature(node).parameters
+    except (TypeError, ValueError):
+        return False
+
+def instrument_node(name: str, node, anode=None, metrics: MetricsRegistry = research_metrics):
+    """Wrap a graph node to record timing, token, state-size and error metrics.
+
+    Returns a RunnableLambda that runs ``node`` when the graph is executed
+    synchronously and ``anode`` (a coroutine function, if given) under
+    ``astream``/``ainvoke``. If the run's config carries
+    ``configurable["trace"]`` (a RunTrace), each execution is also added
+    to that trace.
+    """
+    def before(state):
+        size = state_size_bytes(state)
+        metrics.observe("research_state_bytes", size, node=name)
+        return size
+
+    def after(state, config, update, started, size):
+        duration = time.perf_counter() - started
+        metrics.observe("research_node_duration_seconds", duration, node=name)
+        hops = (update or {}).get("hops", [])
+        for hop in hops:
+            agent = hop["agent"]
+            if agent == "gather" or (hop["prompt_tokens"] == 0 and not hop["error"]):
+                # The gather join and rule-routed supervisor hops make no LLM call
+                continue
+            outcome = "error" if hop["error"] else "cached" if hop.get("cached") else "ok"
+            metrics.inc("research_llm_calls_total", agent=agent, outcome=outcome)
+            if outcome == "ok":
+                metrics.inc("research_prompt_tokens_total", hop["prompt_tokens"], agent=agent)
+                metrics.inc("research_completion_tokens_total", hop["completion_tokens"], agent=agent)
+                metrics.observe("research_llm_latency_seconds", hop.get("latency", 0.0), agent=agent)
+        trace = ((config or {}).get("configurable") or {}).get("trace")
+        if trace is not None:
+            trace.add_span(name, started, duration, state_bytes=size,
+                           llm_seconds=round(sum(hop.get("latency", 0.0) for hop in hops), 4),
+                           prompt_tokens=sum(hop["prompt_tokens"] for hop in hops),
+                           completion_tokens=sum(hop["completion_tokens"] for hop in hops))
+        return update
+
+    passes_config = _accepts_config(node)
+
+    def instrumented(state, config):
+        size = before(state)
+        started = time.perf_counter()
+        try:
+            update = node(state, config) if passes_config else node(state)
+        except Exception:
+            metrics.inc("research_node_errors_total", node=name)
+            raise
+        return after(state, config, update, started, size)
+
+    ainstrumented = None
+    if anode is not None:
+        apasses_config = _accepts_config(anode)
+
+        async def ainstrumented(state, config):
+            size = before(state)
+            started = time.perf_counter()
+            try:
+                update = await (anode(state, config) if apasses_config else anode(state))
+            except Exception:
+                metrics.inc("research_node_errors_total", node=name)
+                raise
+            return after(state, config, update, started, size)
+
+    # Imported here so the /metrics endpoint does not pull in langchain_core
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(instrumented, afunc=ainstrumented, name=name)
+
+def record_run(duration: float, usage: dict, outcome: str, stop_reason: str = None,
+               metrics: MetricsRegistry = research_metrics):
+    metrics.inc("research_runs_total", outcome=outcome)
+    if stop_reason is not None:
+        metrics.inc("research_run_stops_total", reason=stop_reason)
+    metrics.observe("research_run_duration_seconds", duration)
+    metrics.observe("research_run_hops", usage["hops"])
+    metrics.observe("research_run_llm_calls", usage["llm_calls"])
+
+def trace_path_for(run_id: str):
+    """File for a run's trace when RESEARCH_TRACE_DIR is set, else None"""
+    directory = os.getenv("RESEARCH_TRACE_DIR")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{run_id}.trace.json")
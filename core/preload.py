@@ -0,0 +1,38 @@
+"""Pre-fork startup: load the LLM/graph stack once in a server's master process.
+
+With gunicorn's preload_app (see gunicorn.conf.py) the master calls
+``preload`` before forking, so workers share the imported modules and their
+pydantic schemas copy-on-write instead of each importing its own copy.
+``after_fork`` then replaces, in each worker, only what cannot cross a fork.
+"""
+import gc
+import os
+
+def preload_enabled() -> bool:
+    return os.getenv("RESEARCH_PRELOAD", "").lower() in ("1", "true", "yes")
+
+def preload(model: str = None, temperature: float = None):
+    """Import the LLM/graph stack and build the research graph, then freeze the heap.
+
+    gc.freeze() moves everything allocated so far out of the cyclic
+    collector's reach, so collections in the workers don't touch (and so
+    copy) the shared pages.
+    """
+    from .workflow import research_team_registry
+    app = research_team_registry.warm(model=model, temperature=temperature)
+    gc.collect()
+    gc.freeze()
+    return app
+
+def after_fork():
+    """Give a forked worker its own LLM clients, response cache handle and checkpointer.
+
+    Sockets, SQLite connections and the checkpoint compaction thread must
+    not be shared with the master; rebuilding the graph on top of the
+    inherited modules takes milliseconds.
+    """
+    from .cache import reset_response_cache
+    from .workflow import research_team_registry
+    reset_response_cache()
+    research_team_registry.clear()
+    research_team_registry.rebuild()
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Optional
+from .llm import get_llm, resolve_llm_config
+
+ROLES = ("supervisor", "researcher", "arsiv", "tavily", "translator", "analyst", "writer")
+
+# Tier names usable wherever a model is configured; "standard" is RESEARCH_MODEL
+DEFAULT_FAST_MODEL = "gemini-1.5-flash-8b"
+
+# Routing and summarising run on the fast tier; the writer gets the strong tier.
+# Roles with a latency SLO drop to their fallback while the SLO is being missed.
+DEFAULT_ROLE_PROFILES = {
+    "supervisor": {"tier": "fast", "max_output_tokens": 16},
+    "translator": {"tier": "fast", "max_output_tokens": 768},
+    "researcher": {"tier": "standard", "max_output_tokens": 1024, "latency_slo": 30, "fallback": "fast"},
+    "arsiv": {"tier": "standard", "max_output_tokens": 1024, "latency_slo": 30, "fallback": "fast"},
+    "tavily": {"tier": "standard", "max_output_tokens": 1024, "latency_slo": 30, "fallback": "fast"},
+    "analyst": {"tier": "standard", "max_output_tokens": 1024, "latency_slo": 30, "fallback": "fast"},
+    "writer": {"tier": "strong", "max_output_tokens": 4096, "latency_slo": 60, "fallback": "fast"},
+}
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Model settings for one agent role"""
+    model: str
+    temperature: float
+    max_output_tokens: Optional[int] = None
+    latency_slo: Optional[float] = None
+    fallback: Optional[str] = None
+
+def _tiers(model: str, file_tiers: dict) -> dict:
+    tiers = {
+        "fast": DEFAULT_FAST_MODEL,
+        "standard": model,
+        # Same as standard unless configured, so the default setup costs no more than before
+        "strong": model,
+        **file_tiers
+    }
+    if os.getenv("RESEARCH_FAST_MODEL"):
+        tiers["fast"] = os.environ["RESEARCH_FAST_MODEL"]
+    if os.getenv("RESEARCH_STRONG_MODEL"):
+        tiers["strong"] = os.environ["RESEARCH_STRONG_MODEL"]
+    return tiers
+
+def _env_spec(role: str) -> dict:
+    spec = {}
+    prefix = f"RESEARCH_{role.upper()}_"
+    if os.getenv(prefix + "MODEL"):
+        spec["tier"] = os.environ[prefix + "MODEL"]
+    if os.getenv(prefix + "MAX_TOKENS"):
+        spec["max_output_tokens"] = int(os.environ[prefix + "MAX_TOKENS"])
+    if os.getenv(prefix + "LATENCY_SLO"):
+        spec["latency_slo"] = float(os.environ[prefix + "LATENCY_SLO"])
+    return spec
+
+def _read_profiles_file(path: str) -> dict:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def load_profiles(overrides: dict = None, model: str = None, temperature: float = None, path: str = None) -> dict:
+    """Resolve a ModelProfile per role.
+
+    Later sources win: built-in defaults, the JSON file at ``path`` (or
+    RESEARCH_PROFILES_FILE), RESEARCH_<ROLE>_MODEL / _MAX_TOKENS /
+    _LATENCY_SLO, then ``overrides`` ({role: spec dict or ModelProfile}).
+    A spec's "tier" or "fallback" may name a tier (fast, standard, strong)
+    or a model; a max_output_tokens or latency_slo of 0 disables it.
+    """
+    model, temperature = resolve_llm_config(model, temperature)
+    document = _read_profiles_file(path or os.getenv("RESEARCH_PROFILES_FILE"))
+    tiers = _tiers(model, document.get("tiers", {}))
+    overrides = overrides or {}
+    profiles = {}
+    for role in ROLES:
+        if isinstance(overrides.get(role), ModelProfile):
+            profiles[role] = overrides[role]
+            continue
+        spec = {**DEFAULT_ROLE_PROFILES[role], **document.get("roles", {}).get(role, {}),
+                **_env_spec(role), **overrides.get(role, {})}
+        name = spec.get("model") or spec.get("tier", "standard")
+        fallback = spec.get("fallback")
+        profile = ModelProfile(
+            model=tiers.get(name, name),
+            temperature=float(spec.get("temperature", temperature)),
+            max_output_tokens=spec.get("max_output_tokens") or None,
+            latency_slo=spec.get("latency_slo") or None,
+            fallback=tiers.get(fallback, fallback) if fallback else None
+        )
+        if profile.fallback == profile.model or not profile.latency_slo:
+            profile = replace(profile, fallback=None)
+        profiles[role] = profile
+    return profiles
+
+def profile_llm(profile: ModelProfile):
+    return get_llm(temperature=profile.temperature, model=profile.model, max_output_tokens=profile.max_output_tokens)
+
+class LatencyFallback:
+    """Routes a role to a faster model while its primary model misses the latency SLO.
+
+    Primary latency is tracked as an EWMA; while it is over the SLO, calls
+    go to the fallback except every ``probe_every``-th, which re-measures
+    the primary so the role recovers once the provider does.
+    """
+
+    def __init__(self, llm, latency_slo: float, alpha: float = 0.3, probe_every: int = 10):
+        self.llm = llm
+        self.latency_slo = latency_slo
+        self.alpha = alpha
+        self.probe_every = probe_every
+        self._ewma = None
+        self._since_probe = 0
+        self._lock = threading.Lock()
+
+    def choose(self, primary):
+        """(llm, is_fallback) for the next call"""
+        with self._lock:
+            if self._ewma is None or self._ewma <= self.latency_slo:
+                return primary, False
+            self._since_probe += 1
+            if self._since_probe >= self.probe_every:
+                self._since_probe = 0
+                return primary, False
+            return self.llm, True
+
+    def peek(self, primary):
+        """(llm, is_fallback) ``choose`` would return, ignoring a due probe; changes nothing"""
+        with self._lock:
+            if self._ewma is None or self._ewma <= self.latency_slo:
+                return primary, False
+            return self.llm, True
+
+    def record(self, latency: float):
+        """Feed back the latency of a call made on the primary model"""
+        with self._lock:
+            self._ewma = latency if self._ewma is None else self.alpha * latency + (1 - self.alpha) * self._ewma
+
+def profile_fallback(profile: ModelProfile):
+    """LatencyFallback for a role, or None when it has no SLO or fallback model"""
+    if not profile.fallback or not profile.latency_slo:
+        return None
+    llm = get_llm(temperature=profile.temperature, model=profile.fallback, max_output_tokens=profile.max_output_tokens)
+    return LatencyFallback(llm, profile.latency_slo)
@@ -0,0 +1,56 @@
+import threading
+from .llm import discard_llm, resolve_llm_config
+from .profiles import load_profiles
+
+class GraphRegistry:
+    """Process-wide cache of compiled graphs, built once per model/temperature config.
+
+    ``builder(profiles=...)`` receives the per-role model profiles, with the
+    config's model as the standard tier.
+    """
+
+    def __init__(self, builder):
+        self._builder = builder
+        self._apps = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str = None, temperature: float = None):
+        """Return the compiled graph for a config, building it on first use"""
+        key = resolve_llm_config(model, temperature)
+        app = self._apps.get(key)
+        if app is None:
+            with self._lock:
+                app = self._apps.get(key)
+                if app is None:
+                    app = self._build(key)
+                    self._apps[key] = app
+        return app
+
+    def warm(self, model: str = None, temperature: float = None):
+        """Build the graph and LLM clients ahead of the first request"""
+        return self.get(model=model, temperature=temperature)
+
+    def rebuild(self, model: str = None, temperature: float = None):
+        """Rebuild the graph and reconnect its LLM clients.
+
+        The new graph is built before it is swapped in, so requests already
+        holding the old one finish on it undisturbed.
+        """
+        key = resolve_llm_config(model, temperature)
+        for profile in load_profiles(model=key[0], temperature=key[1]).values():
+            discard_llm(temperature=profile.temperature, model=profile.model, max_output_tokens=profile.max_output_tokens)
+            if profile.fallback:
+                discard_llm(temperature=profile.temperature, model=profile.fallback,
+                            max_output_tokens=profile.max_output_tokens)
+        app = self._build(key)
+        with self._lock:
+            self._apps[key] = app
+        return app
+
+    def clear(self):
+        with self._lock:
+            self._apps.clear()
+
+    def _build(self, key):
+        model, temperature = key
+        return self._builder(profiles=load_profiles(model=model, temperature=temperature))
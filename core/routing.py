@@ -0,0 +1,56 @@
+FINISH = "FINISH"
+
+# Declarative routing plan: (agent that just ran, output it must have produced, next step).
+# Output paths are looked up in the graph state; a list means any one of the paths
+# will do, and None means no precondition.
+RESEARCH_PLAN = (
+    ("start", None, "gather"),
+    ("gather", [("findings", "research", "research_overview"),
+                ("findings", "arsiv", "arsiv_summary"),
+                ("findings", "tavily", "tavily_summary")], "translator"),
+    ("researcher", ("findings", "research", "research_overview"), "analyst"),
+    ("arsiv", ("findings", "arsiv", "arsiv_summary"), "translator"),
+    ("tavily", ("findings", "tavily", "tavily_summary"), "translator"),
+    ("translator", ("findings", "translator", "translator_summary"), "analyst"),
+    ("analyst", ("findings", "analysis", "analysis_summary"), "writer"),
+    ("writer", ("final_report",), FINISH),
+)
+
+def _lookup(state, path):
+    value = state
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def _satisfied(state, requires):
+    if isinstance(requires, list):
+        return any(_lookup(state, path) for path in requires)
+    return bool(_lookup(state, requires))
+
+class Router:
+    """Table-driven state machine over ``current_agent`` and ``findings``.
+
+    ``route`` returns the next step when the plan covers the situation, and
+    None when it is ambiguous (unknown agent, agent error or empty output) so
+    the caller can fall back to the LLM supervisor.
+    """
+
+    def __init__(self, plan=RESEARCH_PLAN):
+        self.plan = plan
+        self._rules = {agent: (requires, next_step) for agent, requires, next_step in plan}
+
+    def route(self, state):
+        rule = self._rules.get(state.get("current_agent", "start"))
+        if rule is None:
+            return None
+        requires, next_step = rule
+        if requires is None:
+            return next_step
+        hops = state.get("hops") or []
+        if hops and hops[-1].get("error"):
+            return None
+        if not _satisfied(state, requires):
+            return None
+        return next_step
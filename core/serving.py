@@ -0,0 +1,91 @@
+"""Request handling shared by the Flask (app.py) and ASGI (asgi.py) entry points.
+
+Archive lookups and saves, and the producer behind the /stream server-sent
+events, live here so both servers answer the same request the same way.
+"""
+import asyncio
+import json
+import logging
+import time
+from .workflow import run_research_team, arun_research_team
+from .store import get_report_store
+
+logger = logging.getLogger(__name__)
+
+def saved_at(timestamp) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+def lookup_archived(topic):
+    """Fresh stored report for the topic or a near-duplicate, as template/JSON-friendly fields"""
+    try:
+        record = get_report_store().lookup(topic)
+    except Exception as e:
+        logger.warning('Report store lookup failed: %s', e)
+        return None
+    if record is None:
+        return None
+    return {
+        'id': record['id'],
+        'topic': record['topic'],
+        'report': record['report'],
+        'match': record['match'],
+        'score': record['score'],
+        'saved': saved_at(record['created_at'])
+    }
+
+def archive_report(topic, final_state):
+    """Keep a finished report so repeat and near-duplicate topics are served instantly"""
+    if not (final_state and final_state.get('final_report')):
+        return
+    try:
+        get_report_store().save(topic, final_state['final_report'], final_state.get('findings'))
+    except Exception as e:
+        logger.warning('Report for %r not archived: %s', topic, e)
+
+def sse(event) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+def _archived_event(archived):
+    return {'type': 'done', 'report': archived['report'],
+            'archived': {key: value for key, value in archived.items() if key != 'report'}}
+
+def _final_event(final_state):
+    if final_state and final_state.get('final_report'):
+        return {'type': 'done', 'report': final_state['final_report'], 'summary': final_state['run_summary']}
+    errors = (final_state or {}).get('errors') or ['No report generated.']
+    return {'type': 'error', 'error': errors[-1], 'summary': (final_state or {}).get('run_summary')}
+
+def stream_events(topic, emit, thread_id, refresh=False, budget=None, should_stop=None):
+    """Answer one /stream request through ``emit``: node and token events, then done or error, then None.
+
+    An archived report (unless ``refresh``) is sent as a single done event.
+    """
+    try:
+        archived = None if refresh else lookup_archived(topic)
+        if archived is not None:
+            emit(_archived_event(archived))
+            return
+        final_state = run_research_team(topic, thread_id=thread_id, budget=budget,
+                                        should_stop=should_stop, on_event=emit)
+        archive_report(topic, final_state)
+        emit(_final_event(final_state))
+    except Exception as e:
+        emit({'type': 'error', 'error': f'Error: {str(e)}'})
+    finally:
+        emit(None)
+
+async def astream_events(topic, emit, thread_id, refresh=False, budget=None, should_stop=None):
+    """``stream_events`` on the event loop; archive reads and writes run on worker threads"""
+    try:
+        archived = None if refresh else await asyncio.to_thread(lookup_archived, topic)
+        if archived is not None:
+            emit(_archived_event(archived))
+            return
+        final_state = await arun_research_team(topic, thread_id=thread_id, budget=budget,
+                                               should_stop=should_stop, on_event=emit)
+        await asyncio.to_thread(archive_report, topic, final_state)
+        emit(_final_event(final_state))
+    except Exception as e:
+        emit({'type': 'error', 'error': f'Error: {str(e)}'})
+    finally:
+        emit(None)
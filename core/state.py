@@ -1,15 +1,26 @@
 from typing import Annotated
 from typing_extensions import TypedDict
 import operator
+from .findings import Findings
+
+def merge_findings(left: dict, right: dict) -> dict:
+    """Reducer for findings: updates add or replace per-agent entries instead of the whole dict"""
+    return {**(left or {}), **(right or {})}
 
 class AgentState(TypedDict):
     """State shared between all agents in the graph"""
-    messages: Annotated[list, operator.add]
     next: str
     current_agent: str
     research_topic: str
-    findings: dict
+    # Typed per-agent findings (see core.findings); downstream prompts are built from these
+    findings: Annotated[Findings, merge_findings]
     final_report: str
+    # One record per agent hop: {"agent", "prompt_tokens", "completion_tokens", "error", "cached", "latency"}
+    hops: Annotated[list, operator.add]
+    # Agent failures, kept out of findings so they only reach the supervisor's progress view
+    errors: Annotated[list, operator.add]
+    # Supervisor hops that needed an LLM call because the routing plan was ambiguous
+    supervisor_llm_calls: Annotated[int, operator.add]
 
 class AgentResponse(TypedDict):
     """Standard response format for all agents"""
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+
+DEFAULT_REPORTS_DB = "research_reports.db"
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_SIMILARITY = 0.85
+VECTOR_DIM = 1024
+
+_STOPWORDS = frozenset((
+    "a", "an", "the", "of", "on", "in", "for", "and", "or", "to", "about", "with", "into", "vs", "versus"
+))
+
+def _words(topic: str):
+    text = unicodedata.normalize("NFKC", topic).lower()
+    return re.findall(r"\w+", text)
+
+def _stem(word: str) -> str:
+    # Plural folding only; enough for "battery"/"batteries", "impact"/"impacts"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def normalize_topic(topic: str) -> str:
+    """Case-, plural- and filler-insensitive key: "The impacts of AI on Healthcare" == "impact AI healthcare".
+
+    Word order is kept, since "US exports to China" is not "China exports to US".
+    """
+    words = [w for w in _words(topic) if w not in _STOPWORDS] or _words(topic)
+    return " ".join(_stem(w) for w in words)
+
+def _bucket(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "big") % VECTOR_DIM
+
+def topic_numbers(topic: str) -> frozenset:
+    """Words containing digits ("2", "2024", "5g"); topics that differ in them are never near-duplicates"""
+    return frozenset(w for w in _words(topic) if any(c.isdigit() for c in w))
+
+def topic_vector(topic: str) -> np.ndarray:
+    """L2-normalised hashed vector of the key's words, ordered word pairs and character trigrams.
+
+    The word pairs make word order count, so "China exports to US" scores
+    well below the threshold against "US exports to China".
+    """
+    words = normalize_topic(topic).split()
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for word in words:
+        vector[_bucket("w:" + word)] += 2.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vector[_bucket("c:" + padded[i:i + 3])] += 1.0
+    for first, second in zip(words, words[1:]):
+        vector[_bucket(f"b:{first} {second}")] += 2.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SimilarityIndex:
+    """In-memory matrix of topic vectors searched by cosine similarity"""
+
+    def __init__(self):
+        self._ids = []
+        self._rows = {}
+        self._matrix = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def add(self, report_id: int, vector: np.ndarray):
+        with self._lock:
+            row = self._rows.get(report_id)
+            if row is not None:
+                self._matrix[row] = vector
+                return
+            self._rows[report_id] = len(self._ids)
+            self._ids.append(report_id)
+            self._matrix = np.vstack([self._matrix, vector[None, :]])
+
+    def nearest(self, vector: np.ndarray, limit: int = 5):
+        """[(report_id, score), ...] best first"""
+        with self._lock:
+            if not self._ids:
+                return []
+            scores = self._matrix @ vector
+            top = np.argsort(-scores)[:limit]
+            return [(self._ids[i], float(scores[i])) for i in top]
+
+    def __len__(self):
+        return len(self._ids)
+
+def _fts_query(text: str) -> str:
+    # Quote every term so user input can't be parsed as FTS5 syntax
+    return " ".join('"{}"'.format(w.replace('"', '""')) for w in _words(text))
+
+class ReportStore:
+    """SQLite archive of finished reports with FTS5 search and near-duplicate topic lookup"""
+
+    COLUMNS = ("id", "topic", "topic_key", "report", "findings", "created_at")
+
+    def __init__(self, path: str = None, max_age: float = None, similarity: float = None):
+        self.path = path or os.getenv("RESEARCH_REPORTS_DB", DEFAULT_REPORTS_DB)
+        self.max_age = max_age if max_age is not None else float(os.getenv("RESEARCH_REPORT_MAX_AGE", DEFAULT_MAX_AGE))
+        self.similarity = similarity or float(os.getenv("RESEARCH_REPORT_SIMILARITY", DEFAULT_SIMILARITY))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id INTEGER PRIMARY KEY, topic TEXT NOT NULL, topic_key TEXT NOT NULL UNIQUE, "
+            "report TEXT NOT NULL, findings TEXT NOT NULL, created_at REAL NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(topic, report, tokenize='porter unicode61')")
+        self._conn.commit()
+        self.index = SimilarityIndex()
+        self._indexed_up_to = 0
+        self._sync_index()
+
+    def _sync_index(self):
+        """Pick up reports saved by other processes sharing the database"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, vector FROM reports WHERE id > ? ORDER BY id", (self._indexed_up_to,)
+            ).fetchall()
+            for report_id, vector in rows:
+                self.index.add(report_id, np.frombuffer(vector, dtype=np.float32))
+                self._indexed_up_to = report_id
+
+    def save(self, topic: str, report: str, findings: dict = None) -> int:
+        """Store (or replace) the report for a topic's normalised key"""
+        key = normalize_topic(topic)
+        vector = topic_vector(topic)
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM reports WHERE topic_key = ?", (key,)).fetchone()
+            values = (topic, report, json.dumps(findings or {}, ensure_ascii=False, default=str), time.time(),
+                      vector.tobytes())
+            if row:
+                report_id = row[0]
+                self._conn.execute(
+                    "UPDATE reports SET topic = ?, report = ?, findings = ?, created_at = ?, vector = ? WHERE id = ?",
+                    (*values, report_id)
+                )
+                self._conn.execute("DELETE FROM reports_fts WHERE rowid = ?", (report_id,))
+            else:
+                report_id = self._conn.execute(
+                    "INSERT INTO reports (topic, report, findings, created_at, vector, topic_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (*values, key)
+                ).lastrowid
+            self._conn.execute("INSERT INTO reports_fts (rowid, topic, report) VALUES (?, ?, ?)",
+                               (report_id, topic, report))
+            self._conn.commit()
+        self.index.add(report_id, vector)
+        return report_id
+
+    def get(self, report_id: int):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(self.COLUMNS, row))
+        record["findings"] = json.loads(record["findings"])
+        return record
+
+    def lookup(self, topic: str, max_age: float = None):
+        """Freshest stored report for ``topic`` or a near-duplicate of it, else None.
+
+        The record gains "match" ("exact" or "similar") and "score". Reports
+        older than ``max_age`` seconds (default RESEARCH_REPORT_MAX_AGE; 0
+        disables lookups) are ignored.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        if not max_age:
+            return None
+        oldest = time.time() - max_age
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM reports WHERE topic_key = ? AND created_at >= ?", (normalize_topic(topic), oldest)
+            ).fetchone()
+        if row:
+            return {**self.get(row[0]), "match": "exact", "score": 1.0}
+        self._sync_index()
+        numbers = topic_numbers(topic)
+        for report_id, score in self.index.nearest(topic_vector(topic)):
+            if score < self.similarity:
+                break
+            record = self.get(report_id)
+            # "type 1" and "type 2", or "2020" and "2024", are different topics however close the rest is
+            if record and record["created_at"] >= oldest and topic_numbers(record["topic"]) == numbers:
+                return {**record, "match": "similar", "score": round(score, 3)}
+        return None
+
+    def search(self, query: str, limit: int = 20):
+        """Full-text search over stored topics and reports, best match first"""
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.id, r.topic, r.created_at, snippet(reports_fts, 1, '[', ']', '...', 24), bm25(reports_fts) "
+                "FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+                "WHERE reports_fts MATCH ? ORDER BY bm25(reports_fts) LIMIT ?", (match, limit)
+            ).fetchall()
+        return [{"id": r[0], "topic": r[1], "created_at": r[2], "snippet": r[3], "rank": round(r[4], 3)} for r in rows]
+
+    def count(self) -> int:
+        return len(self.index)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_report_store() -> ReportStore:
+    """Process-wide report store configured from RESEARCH_REPORT* environment variables"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ReportStore()
+    return _store
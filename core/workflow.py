@@ -1,31 +1,69 @@
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import HumanMessage, AIMessage
+import time
+import uuid
 from .state import AgentState
-from .llm import create_llm
-from .agents import (
-    create_research_agent, create_analyst_agent, create_writer_agent, create_supervisor_agent,
-    create_arsiv_agent, create_tavily_agent, create_translator_agent
-)
-
-def create_research_team_graph():
-    llm = create_llm()
+from .profiles import ROLES, load_profiles, profile_llm, profile_fallback
+from .registry import GraphRegistry
+from .routing import Router
+from .governor import get_governor
+from .metrics import research_metrics, instrument_node, record_run, RunTrace, trace_path_for
+from .budget import RunBudget, BudgetController, run_usage
+
+# langgraph, langchain_core and the agents are imported where the graph is built
+# or run, so importing this module (and app.py) does not load the LLM stack
+
+def _team_nodes(llms, fallbacks, compactor, cache, router, asynchronous=False):
+    from .agents import (
+        create_research_agent, create_analyst_agent, create_writer_agent, create_supervisor_agent,
+        create_arsiv_agent, create_tavily_agent, create_translator_agent, create_gather_agent
+    )
     members = ["researcher", "analyst", "writer", "arsiv", "tavily", "translator"]
-    researcher = create_research_agent(llm)
-    analyst = create_analyst_agent(llm)
-    writer = create_writer_agent(llm)
-    arsiv = create_arsiv_agent(llm)
-    tavily = create_tavily_agent(llm)
-    translator = create_translator_agent(llm)
-    supervisor = create_supervisor_agent(llm, members)
+    agent = lambda create, role: create(llms[role], compactor, cache, fallbacks.get(role), asynchronous=asynchronous)
+    # Source gathering agents are independent, so they run concurrently
+    branches = {
+        "researcher": agent(create_research_agent, "researcher"),
+        "arsiv": agent(create_arsiv_agent, "arsiv"),
+        "tavily": agent(create_tavily_agent, "tavily")
+    }
+    supervisor = create_supervisor_agent(llms["supervisor"], members, compactor, router, cache,
+                                         fallbacks.get("supervisor"), asynchronous=asynchronous,
+                                         step_calls={"gather": len(branches)})
+    return {
+        "gather": create_gather_agent(branches, asynchronous=asynchronous),
+        "researcher": branches["researcher"],
+        "analyst": agent(create_analyst_agent, "analyst"),
+        "writer": agent(create_writer_agent, "writer"),
+        "arsiv": branches["arsiv"],
+        "tavily": branches["tavily"],
+        "translator": agent(create_translator_agent, "translator"),
+        "supervisor": supervisor
+    }
+
+def create_research_team_graph(llm=None, compactor=None, router=None, cache=None, profiles=None):
+    """Build the team graph; with ``llm`` every role shares that client, otherwise
+    each role gets the model from its profile (see core.profiles.load_profiles)"""
+    from langgraph.graph import StateGraph, END
+    from .context import ContextCompactor
+    from .cache import get_response_cache
+    if compactor is None:
+        compactor = ContextCompactor()
+    if cache is None:
+        cache = get_response_cache()
+    if llm is None:
+        profiles = profiles or load_profiles()
+        llms = {role: profile_llm(profile) for role, profile in profiles.items()}
+        fallbacks = {role: profile_fallback(profile) for role, profile in profiles.items()}
+    else:
+        llms = {role: llm for role in ROLES}
+        fallbacks = {}
+    router = router or Router()
+    # Every node gets a sync and an async implementation, so one compiled graph
+    # serves both stream()/invoke() and astream()/ainvoke()
+    sync_nodes = _team_nodes(llms, fallbacks, compactor, cache, router, asynchronous=False)
+    async_nodes = _team_nodes(llms, fallbacks, compactor, cache, router, asynchronous=True)
     workflow = StateGraph(AgentState)
-    workflow.add_node("researcher", researcher)
-    workflow.add_node("analyst", analyst)
-    workflow.add_node("writer", writer)
-    workflow.add_node("arsiv", arsiv)
-    workflow.add_node("tavily", tavily)
-    workflow.add_node("translator", translator)
-    workflow.add_node("supervisor", supervisor)
+    for name, node in sync_nodes.items():
+        workflow.add_node(name, instrument_node(name, node, async_nodes[name]))
+    workflow.add_edge("gather", "supervisor")
     workflow.add_edge("researcher", "supervisor")
     workflow.add_edge("analyst", "supervisor")
     workflow.add_edge("writer", "supervisor")
@@ -36,6 +74,7 @@ def create_research_team_graph():
         "supervisor",
         lambda x: x["next"],
         {
+            "gather": "gather",
             "researcher": "researcher",
             "analyst": "analyst",
             "writer": "writer",
@@ -48,27 +87,168 @@ def create_research_team_graph():
     workflow.set_entry_point("supervisor")
     return workflow
 
-def compile_research_team():
-    workflow = create_research_team_graph()
-    memory = MemorySaver()
-    app = workflow.compile(checkpointer=memory)
+def compile_research_team(llm=None, checkpointer=None, profiles=None):
+    from .checkpoint import create_checkpointer
+    workflow = create_research_team_graph(llm, profiles=profiles)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
+    app = workflow.compile(checkpointer=checkpointer)
     return app
 
-def run_research_team(topic: str, thread_id: str = "research_session_1"):
-    app = compile_research_team()
-    initial_state = {
-        "messages": [HumanMessage(content=f"Research the topic: {topic}")],
+# Compiled graphs are shared by every request in the process
+research_team_registry = GraphRegistry(compile_research_team)
+
+def _governor_metrics():
+    metrics = get_governor().metrics()
+    return {**metrics, "circuit_open": int(metrics["circuit"] == "open")}
+
+def _cache_metrics():
+    from .cache import get_response_cache
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {}
+
+# Shared LLM plumbing is exported alongside the per-node metrics
+research_metrics.add_collector("research_llm_governor", _governor_metrics)
+research_metrics.add_collector("research_llm_cache", _cache_metrics)
+
+def get_research_team(model: str = None, temperature: float = None):
+    return research_team_registry.get(model=model, temperature=temperature)
+
+def _initial_state(topic: str):
+    # Agent replies are kept only as parsed findings and the final report, so
+    # checkpoints do not carry a transcript no prompt reads
+    return {
         "research_topic": topic,
-        "next": "researcher",
+        "next": "gather",
         "current_agent": "start",
         "findings": {},
-        "final_report": ""
+        "final_report": "",
+        "hops": [],
+        "errors": [],
+        "supervisor_llm_calls": 0
     }
-    config = {"configurable": {"thread_id": thread_id}}
-    final_state = None
-    for step, state in enumerate(app.stream(initial_state, config=config)):
-        current_state = list(state.values())[0]
-        final_state = current_state
-        if step > 10:
+
+class _RunTracker:
+    """Config, events, budget, cancellation and run metrics shared by the sync and async runners"""
+
+    def __init__(self, thread_id, should_stop=None, on_event=None, trace_path=None, budget=None):
+        # Runs share one compiled graph and checkpointer, so every run needs its own thread
+        self.thread_id = thread_id or f"run_{uuid.uuid4().hex}"
+        self.budget = BudgetController(budget)
+        self.config = {"configurable": {"thread_id": self.thread_id, "budget": self.budget}}
+        self.should_stop = should_stop
+        self.on_event = on_event
+        if on_event is not None:
+            self.config["configurable"]["on_token"] = lambda text: on_event(
+                {"type": "token", "agent": "writer", "text": text})
+        self.trace_path = trace_path or trace_path_for(self.thread_id)
+        self.trace = RunTrace(self.thread_id) if self.trace_path else None
+        if self.trace is not None:
+            self.config["configurable"]["trace"] = self.trace
+        self.stopped = False
+        self.overrun = False
+        self.started = time.monotonic()
+
+    def step(self, step, update) -> bool:
+        """Report one node update; True when the run should stop here"""
+        if self.on_event is not None:
+            for node, delta in update.items():
+                self.on_event({
+                    "type": "node",
+                    "agent": node,
+                    "elapsed": round(time.monotonic() - self.started, 3),
+                    "findings": (delta or {}).get("findings", {})
+                })
+        # The supervisor keeps the run within budget; this only stops a graph that ignores it
+        if self.budget.overrun(step):
+            self.overrun = True
+            return True
+        # Checked between nodes, so cancellation takes effect after the running agent returns
+        if self.should_stop is not None and self.should_stop():
+            self.stopped = True
+            return True
+        return False
+
+    def finish(self, final_state):
+        duration = time.monotonic() - self.started
+        usage = run_usage(final_state)
+        summary = self.budget.summary(final_state, stopped=self.stopped, overrun=self.overrun)
+        # Later runs price their first steps from what this one spent
+        self.budget.prior.observe(final_state)
+        if self.stopped:
+            outcome = "stopped"
+        elif self.overrun:
+            outcome = "capped"
+        elif not final_state.get("final_report"):
+            outcome = "no_report"
+        else:
+            outcome = "wrapped_up" if summary["wrapped_up"] else "completed"
+        record_run(duration, usage, outcome, summary["stop_reason"])
+        if self.trace is not None:
+            self.trace.add_span("run", self.trace.started, duration, outcome=outcome,
+                                stop_reason=summary["stop_reason"], **usage)
+            self.trace.write(self.trace_path)
+        return {**final_state, "run_summary": summary}
+
+def run_research_team(topic: str, thread_id: str = None, app=None, should_stop=None,
+                      on_event=None, resume: bool = False, trace_path: str = None, budget: RunBudget = None):
+    """Run the research graph for one topic and return its final state.
+
+    ``on_event`` receives a dict per node transition ({"type": "node",
+    "agent", "elapsed", "findings"}) and per chunk of writer output
+    ({"type": "token", "agent": "writer", "text"}). Without ``thread_id``
+    the run gets a fresh one; pass a stable id to resume it. With ``resume``, a
+    thread that already has checkpoints continues from the last one
+    instead of starting over; a thread that finished with a report returns
+    it, and one that finished without a report is cleared and run again. ``trace_path`` (or RESEARCH_TRACE_DIR)
+    writes a Chrome trace of the run's node timeline.
+
+    ``budget`` (default RunBudget.from_env()) bounds wall time, LLM calls,
+    tokens and agent hops; near a limit, or when routing loops, the run
+    goes straight to the writer. The returned state carries a
+    "run_summary" saying why the run stopped and what it spent.
+    """
+    if app is None:
+        app = get_research_team()
+    run = _RunTracker(thread_id, should_stop, on_event, trace_path, budget)
+    graph_input = _initial_state(topic)
+    if resume:
+        snapshot = app.get_state(run.config)
+        if snapshot.values and not snapshot.next:
+            if snapshot.values.get("final_report"):
+                return run.finish(snapshot.values)
+            # Finished without a report: retry from scratch instead of returning the old failure
+            app.checkpointer.delete_thread(run.thread_id)
+        elif snapshot.next:
+            graph_input = None
+    for step, update in enumerate(app.stream(graph_input, config=run.config)):
+        if run.step(step, update):
             break
-    return final_state 
\ No newline at end of file
+    # Nodes return deltas, so read the merged state back from the checkpointer
+    return run.finish(app.get_state(run.config).values)
+
+async def arun_research_team(topic: str, thread_id: str = None, app=None, should_stop=None,
+                             on_event=None, resume: bool = False, trace_path: str = None, budget: RunBudget = None):
+    """``run_research_team`` on the event loop: agents await their LLM calls instead of holding a thread"""
+    if app is None:
+        app = get_research_team()
+    run = _RunTracker(thread_id, should_stop, on_event, trace_path, budget)
+    graph_input = _initial_state(topic)
+    if resume:
+        snapshot = await app.aget_state(run.config)
+        if snapshot.values and not snapshot.next:
+            if snapshot.values.get("final_report"):
+                return run.finish(snapshot.values)
+            await app.checkpointer.adelete_thread(run.thread_id)
+        elif snapshot.next:
+            graph_input = None
+    step = 0
+    async for update in app.astream(graph_input, config=run.config):
+        if run.step(step, update):
+            break
+        step += 1
+    return run.finish((await app.aget_state(run.config)).values)
+
+def prompt_tokens_per_hop(state):
+    """[(agent, prompt_tokens), ...] for a finished run, to check prompt size stays flat"""
+    return [(hop["agent"], hop["prompt_tokens"]) for hop in state.get("hops", [])]
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""gunicorn settings for the Flask app:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The master imports the LLM/graph stack and builds the research graph once
+(preload), then forks workers that share those pages copy-on-write; each
+worker only reopens its own connections (core.preload.after_fork).
+"""
+import os
+
+os.environ.setdefault("RESEARCH_PRELOAD", "1")
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Research requests and /stream hold a thread for the whole run
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = True
+
+def post_fork(server, worker):
+    from core.preload import after_fork
+    after_fork()